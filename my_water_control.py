@@ -27,18 +27,26 @@ def my_water_control(msmnts, design_vars):
     Cu = msmnts[3:6]   # untreated concentrations
     Ct = msmnts[6:9]   #   treated concentrations
 
+    # controller gains, as design variables after Qp_max, or default gains
+    #   a_u, a_p   exponents of the treated volume ratio in Qu and Qp
+    #   s          scale factors of the three decontaminant coefficients
+    gains = design_vars[4:9] if len(design_vars) > 4 else [2, 2, 1, 1, 1]
+    a_u = gains[0]
+    a_p = gains[1]
+    s   = np.array(gains[2:5])
+
     # use the measurements of volumes and concentrations
     # (current values and allowable limits)
     # to determine flows through the treatment plant
 
     # flow from reservoir into untreated tank
-    Qu = Qp_max * (1 - (Vt / Vt_max)**2)        # ??? (this is *technically* the answer key, replace line with: Qu = ???) !!!   # *****
+    Qu = Qp_max * (1 - (Vt / Vt_max)**a_u)      # ??? (this is *technically* the answer key, replace line with: Qu = ???) !!!   # *****
 
     # flow processed through the treatment plant
-    Qp = Qp_max * (1 - (Vt / Vt_max)**2)        # ??? (this is *technically* the answer key, replace line with: Qp = ???) !!!    # *****
+    Qp = Qp_max * (1 - (Vt / Vt_max)**a_p)      # ??? (this is *technically* the answer key, replace line with: Qp = ???) !!!    # *****
 
     # flows for each of the three decontaminants
-    q = np.array([7e-7, 9e-5, 2e-4]) * Cu * Qp  # ??? (this is *technically* the answer key, replace line with: q = np.array([???, ???, ???]) !!!   # *****
+    q = np.array([7e-7, 9e-5, 2e-4]) * s * Cu * Qp  # ??? (this is *technically* the answer key, replace line with: q = np.array([???, ???, ???]) !!!   # *****
 
 
     u = np.array([Qu, Qp, *q])
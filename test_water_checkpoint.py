@@ -0,0 +1,74 @@
+# test_water_checkpoint.py
+# tests of the checkpoints of long simulations in water_analysis.py
+#
+# usage:   python -m pytest -q test_water_checkpoint.py
+
+import os
+import numpy as np
+import pytest
+import water_analysis
+from water_constants import water_constants
+from water_analysis import water_simulate
+
+
+v = np.array([10000, 500, 500, 200], dtype=float)
+
+
+def small_constants():
+    constants = water_constants()
+    constants[-2] = 3           # 3 year simulations
+    constants[-1] = 0           # no plots
+    return constants
+
+
+def interrupted_run(monkeypatch, checkpoint, n_segments, **kwargs):
+    # integrate n_segments segments, then fail as an interrupted run would
+    integrate = water_analysis._integrate
+    calls = []
+
+    def failing_integrate(*args):
+        if len(calls) == n_segments:
+            raise KeyboardInterrupt
+        calls.append(1)
+        return integrate(*args)
+
+    monkeypatch.setattr(water_analysis, '_integrate', failing_integrate)
+    with pytest.raises(KeyboardInterrupt):
+        water_simulate(v, small_constants(), checkpoint=checkpoint, checkpoint_days=200, **kwargs)
+    monkeypatch.setattr(water_analysis, '_integrate', integrate)
+
+
+@pytest.mark.parametrize('dtype', [None, np.float32])
+def test_resumed_run_matches_plain_run(tmp_path, monkeypatch, dtype):
+    checkpoint = str(tmp_path / 'ckpt')
+
+    np.random.seed(1)
+    interrupted_run(monkeypatch, checkpoint, 2, dtype=dtype)
+    assert sorted(os.listdir(checkpoint)) == ['forcing.npz', 'segment-000000-000200.npz',
+                                              'segment-000200-000400.npz']
+
+    np.random.seed(99)          # the forcing and the generator state come from the checkpoint
+    t, x, Q, w, RainFall, log_lr, cost = water_simulate(v, small_constants(), checkpoint=checkpoint,
+                                                        checkpoint_days=200, dtype=dtype)
+    assert not os.path.exists(checkpoint)
+    state = np.random.get_state()[1]
+
+    np.random.seed(1)
+    t_p, x_p, Q_p, w_p, RainFall_p, _, cost_p = water_simulate(v, small_constants(), dtype=dtype)
+    assert np.array_equal(w, w_p) and np.array_equal(RainFall, RainFall_p)
+    assert x.dtype == x_p.dtype
+    assert np.array_equal(x, x_p)
+    assert np.array_equal(Q, Q_p)
+    assert cost == cost_p
+    assert np.array_equal(state, np.random.get_state()[1])
+
+
+def test_resume_with_other_dtype(tmp_path, monkeypatch):
+    checkpoint = str(tmp_path / 'ckpt')
+
+    np.random.seed(1)
+    interrupted_run(monkeypatch, checkpoint, 1, dtype=np.float32)
+    with pytest.raises(ValueError, match='dtype'):
+        water_simulate(v, small_constants(), checkpoint=checkpoint, checkpoint_days=200)
+
+# test_water_checkpoint ------------------------------------------- 2026-10-19
@@ -0,0 +1,49 @@
+# test_water_hourly.py
+# tests of the multi-rate simulation of water_hourly.py
+#
+# usage:   python -m pytest -q test_water_hourly.py
+
+import numpy as np
+from water_constants import water_constants
+from water_analysis import water_simulate
+from water_hourly import water_hourly
+
+
+v = np.array([10000, 500, 500, 200], dtype=float)
+
+
+def small_constants():
+    constants = water_constants()
+    constants[-2] = 2           # 2 year simulations
+    constants[-1] = 0           # no plots
+    return constants
+
+
+def test_daily_steps_match_water_simulate():
+    constants = small_constants()
+
+    np.random.seed(1)
+    t, x, Q, w, RainFall, Qr_max, fine, cost = water_hourly(v, constants, refine='never')
+    assert not np.any(fine)
+
+    for dtype in [None, np.float64]:
+        np.random.seed(1)
+        t_d, x_d, Q_d, w_d, _, _, cost_d = water_simulate(v, constants, dtype=dtype)
+        assert np.array_equal(w, w_d)
+        assert np.array_equal(x, x_d)
+        assert np.array_equal(Q, Q_d)
+        assert cost == cost_d
+
+
+def test_refined_days_keep_the_daily_values():
+    constants = small_constants()
+
+    np.random.seed(1)
+    t, x, Q, w, RainFall, Qr_max, fine, cost = water_hourly(v, constants, refine='auto')
+    assert np.any(fine)
+
+    np.random.seed(1)
+    _, x_d, _, _, _, _, cost_d = water_simulate(v, constants)
+    np.testing.assert_allclose(cost, cost_d, rtol=0.05)
+
+# test_water_hourly ----------------------------------------------- 2026-10-19
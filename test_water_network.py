@@ -0,0 +1,67 @@
+# test_water_network.py
+# tests of the network formulation of water_network.py
+#
+# usage:   python -m pytest -q test_water_network.py
+
+import numpy as np
+from water_constants import water_constants
+from water_system import water_system
+from water_network import water_network, water_network_preset, water_network_system
+
+
+v = np.array([10000, 500, 500, 200], dtype=float)
+w = np.array([120e3, 70.0, 2e3, 12.0])  # population, temperature, precipitation, demand
+
+
+def test_preset_matches_water_system():
+    constants = water_constants()
+    net = water_network_preset(v, constants)
+
+    # the network states are [ volumes (4) ; masses (4 x 3) ; cost ], with the
+    # untracked ground water masses, and those of water_system are
+    # [ volumes (4) ; masses of the reservoir and the tanks (3 x 3) ; cost ]
+    x = net['x0']
+    states = np.r_[0:4, 7:17]
+    dxdt, Q = water_system(0.0, x[states], w, [v, *constants])
+    dxdt_net, Q_net = water_network_system(0.0, x, w, net)
+
+    np.testing.assert_allclose(dxdt_net[states], dxdt, rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(Q_net[-1], Q[4], rtol=1e-12)          # river flow
+
+
+def test_watershed_feeding_two_reservoirs():
+    constants = water_constants()
+    alpha_t, beta_t, alpha_s, alpha_g = constants[0:4]
+    Vg_max = constants[14]
+
+    nodes = [('ground', 'ground',    Vg_max, 1.0),
+             ('res_a',  'reservoir', 6000,   0.0),
+             ('res_b',  'reservoir', 4000,   0.0),
+             ('unt_a',  'untreated', 300,    0.0),
+             ('unt_b',  'untreated', 200,    0.0),
+             ('trt_a',  'treated',   300,    0.6),
+             ('trt_b',  'treated',   200,    0.4)]
+    edges = [('ground', 'res_a', 'stream'),
+             ('ground', 'res_b', 'stream'),
+             ('ground', 'res_a', 'baseflow'),
+             ('ground', 'res_b', 'baseflow'),
+             ('res_a',  'unt_a', 'intake'),
+             ('res_b',  'unt_b', 'intake'),
+             ('unt_a',  'trt_a', 'plant', 120),
+             ('unt_b',  'trt_b', 'plant', 80)]
+    net = water_network(nodes, edges, constants)
+    dxdt, Q = water_network_system(0.0, net['x0'], w, net)
+
+    # the ground water is drained once by its stream and ground water flows,
+    # which are divided between the two reservoirs
+    Vg = net['x0'][0]
+    Qt = (alpha_t + beta_t * w[1]) * Vg / Vg_max
+    Qs = alpha_s * Vg / Vg_max
+    Qg = alpha_g * Vg / Vg_max
+    np.testing.assert_allclose(dxdt[0], w[2] - Qt - Qs - Qg, rtol=1e-12)
+    np.testing.assert_allclose(Q[0:4], [Qs / 2, Qs / 2, Qg / 2, Qg / 2], rtol=1e-12)
+
+    # the flows of the edges leave their sources and reach their destinations
+    np.testing.assert_allclose(np.sum(net['B'] @ Q[:-1]), 0.0, atol=1e-9)
+
+# test_water_network ---------------------------------------------- 2026-10-19
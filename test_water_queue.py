@@ -0,0 +1,74 @@
+# test_water_queue.py
+# tests of the task queue of water_queue.py on one computer
+#
+# usage:   python -m pytest -q test_water_queue.py
+
+import numpy as np
+from water_constants import water_constants
+from water_batch import water_batch
+from water_queue import SQLiteQueue, water_queue_workers
+
+
+def small_constants():
+    constants = water_constants()
+    constants[-2] = 1           # 1 year simulations
+    constants[-1] = 0           # no plots
+    return constants
+
+
+def test_late_failure_of_expired_lease(tmp_path):
+    queue = SQLiteQueue(str(tmp_path / 'queue.db'))
+    task_id, = queue.submit([[10000, 500, 500, 200]], small_constants(), seeds=[1])
+
+    assert len(queue.claim('a', lease=-1)) == 1        # lease of 'a' expires at once
+    assert len(queue.claim('b', lease=3600)) == 1      # and the task is claimed by 'b'
+
+    queue.fail(task_id, 'a', 'late error of a')        # ignored, 'b' holds the task
+    assert queue.counts()['running'] == 1
+    assert queue.claim('c') == []
+
+    queue.fail(task_id, 'b', 'error of b')             # returned to the queue
+    assert queue.counts()['pending'] == 1
+
+
+def test_expired_leases_fail_after_max_attempts(tmp_path):
+    queue = SQLiteQueue(str(tmp_path / 'queue.db'), max_attempts=2)
+    queue.submit([[10000, 500, 500, 200]], small_constants(), seeds=[1])
+
+    assert len(queue.claim('a', lease=-1)) == 1
+    assert len(queue.claim('b', lease=-1)) == 1
+    assert queue.claim('c') == []
+    assert queue.counts()['failed'] == 1
+
+
+def test_journal_mode(tmp_path):
+    queue = SQLiteQueue(str(tmp_path / 'wal.db'))
+    assert queue.db.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    queue = SQLiteQueue(str(tmp_path / 'delete.db'), journal_mode='DELETE')
+    assert queue.db.execute('PRAGMA journal_mode').fetchone()[0] == 'delete'
+
+
+def test_local_workers(tmp_path):
+    path = str(tmp_path / 'queue.db')
+    constants = small_constants()
+    V = np.array([[10000, 500, 500, 200],
+                  [ 8000, 400, 600, 150],
+                  [12000, 600, 400, 250]], dtype=float)
+    V = np.repeat(V, 2, axis=0)
+    seeds = np.tile([1, 2], 3)
+
+    queue = SQLiteQueue(path)
+    queue.submit(V, constants, seeds)
+    queue.submit(V, constants, seeds)                  # re-submitting does not duplicate tasks
+    water_queue_workers(path, 3, batch=1, poll=0.1)
+
+    assert queue.counts() == {'pending': 0, 'running': 0, 'done': len(V), 'failed': 0}
+
+    V_done, seeds_done, chash, cost, constraint = queue.results()
+    order = [next(i for i in range(len(V)) if np.array_equal(V_done[i], V[k]) and seeds_done[i] == seeds[k])
+             for k in range(len(V))]
+    cost_serial, constraint_serial = water_batch(V, constants, seeds=seeds, n_workers=1)
+    assert np.array_equal(cost[order], cost_serial)
+    assert np.array_equal(constraint[order], constraint_serial)
+
+# test_water_queue ------------------------------------------------ 2026-10-19
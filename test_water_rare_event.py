@@ -0,0 +1,50 @@
+# test_water_rare_event.py
+# tests of the subset simulation of water_rare_event.py
+#
+# usage:   python -m pytest -q test_water_rare_event.py
+
+import numpy as np
+from water_constants import water_constants
+from water_analysis import water_simulate
+from water_rare_event import water_event, water_rare_event
+
+
+v = np.array([10000, 500, 500, 200], dtype=float)
+
+
+def small_constants():
+    constants = water_constants()
+    constants[-2] = 1           # 1 year simulations
+    constants[-1] = 0           # no plots
+    return constants
+
+
+def test_matches_plain_monte_carlo():
+    constants = small_constants()
+    threshold = 800             # river flow with a probability of about 1e-2 in one year
+
+    N_mc = 1000
+    np.random.seed(1)
+    g = np.zeros(N_mc)
+    for sim in range(N_mc):
+        _, x, Q, _, _, _, _ = water_simulate(v, constants)
+        g[sim] = water_event(v, x, Q, 'flood', threshold)
+    P_mc = np.mean(g >= 0)
+    cov_mc = np.sqrt((1 - P_mc) / (P_mc * N_mc))
+
+    P, P_ci, n_sims = water_rare_event(v, constants, 'flood', N=200, seed=2, threshold=threshold)
+    assert P_ci[0] < P < P_ci[1]
+    assert n_sims < N_mc
+
+    # the two estimates agree within three standard deviations of the
+    # log of their ratio, with the c.o.v. of P from its confidence bounds
+    cov_ss = np.log(P_ci[1] / P) / 1.96
+    assert abs(np.log(P / P_mc)) < 3 * np.hypot(cov_mc, cov_ss)
+
+
+def test_no_estimate_without_hits():
+    P, P_ci, n_sims = water_rare_event(v, small_constants(), 'flood', N=20, max_levels=0, seed=1, threshold=1e6)
+    assert np.isnan(P) and np.all(np.isnan(P_ci))
+    assert n_sims == 20
+
+# test_water_rare_event ------------------------------------------- 2026-10-19
@@ -0,0 +1,45 @@
+# test_water_store.py
+# tests of the on-disk store of simulation results of water_store.py
+#
+# usage:   python -m pytest -q test_water_store.py
+
+import numpy as np
+from water_store import water_store_append, water_store_load, water_store_find, water_store_trajectory
+
+
+V = np.array([[10000, 500, 500, 200],
+              [ 8000, 400, 600, 150]], dtype=float)
+
+
+def test_find_and_skip_existing(tmp_path):
+    path = str(tmp_path / 'store')
+    x = [np.full((14, 730), i, dtype=float) for i in range(4)]
+    Q = [np.full((5, 730), i, dtype=float) for i in range(4)]
+
+    V4 = np.repeat(V, 2, axis=0)
+    seeds = np.tile([1, 2], 2)
+    assert len(water_store_append(path, V4, seeds, 'abc', np.arange(4.0), np.zeros((4, 2)),
+                                  x=x, Q=Q, traj='year')) == 1
+
+    # the same records again, and one new record, after the ones already stored
+    assert water_store_append(path, V4, seeds, 'abc', np.arange(4.0), np.zeros((4, 2)), x=x, Q=Q) == []
+    water_store_append(path, V[:1], [3], 'abc', [4.0], np.zeros((1, 2)), x=x[:1], Q=Q[:1], traj='year')
+
+    data = water_store_load(path)
+    assert len(data['seed']) == 5
+
+    index = water_store_find(path, v=V[1])
+    assert np.array_equal(np.asarray(data['seed'])[index], [1, 2])
+    index = water_store_find(path, v=V[1], seed=2, chash='abc')
+    assert np.asarray(data['cost'])[index].tolist() == [3.0]
+    assert len(water_store_find(path, chash='xyz')) == 0
+
+    x3, Q3 = water_store_trajectory(path, data['shard'][index[0]], data['row'][index[0]])
+    assert x3.shape == (14, 2) and np.all(x3 == 3) and np.all(Q3 == 3)
+
+    # records without a scenario seed are not re-producible, and always stored
+    water_store_append(path, V[:1], [-1], 'abc', [5.0], np.zeros((1, 2)))
+    water_store_append(path, V[:1], [-1], 'abc', [5.0], np.zeros((1, 2)))
+    assert len(water_store_find(path, seed=-1)) == 2
+
+# test_water_store ------------------------------------------------ 2026-10-19
@@ -1,13 +1,346 @@
+import os
+import glob
+import shutil
 import numpy as np
 import matplotlib.pyplot as plt
 from multivarious.rvs import gamma, lognormal
+from scipy.special import ndtr, gammainccinv
 from water_system import water_system
+from water_constants import water_constants_hash
+from water_checkpoint import water_checkpoint_save, water_checkpoint_load
+from water_diagnostics import water_diagnostics
 from multivarious.utils import ode4u
 
 
-def water_analysis(v, constants):
+# the nominal rainfall model of water_forcing
+rain_shape   = 1.0 / 1.47**2                 # gamma shape for c.o.v. of 1.47
+area_log_std = np.sqrt(np.log(1 + 0.90**2))  # log-std. dev. for c.o.v. of 0.90
+
+
+def water_forcing(constants, tilt=None, u=None):
+    """
+    t, w, RainFall, log_lr, log_area = water_forcing( constants , tilt , u )
+    pre-determine the environmental time series sequences of 
+    population, temperature, precipitation, and water demand 
+
+     INPUTS    DESCRIPTION
+     constants a set of many constants involved in this system
+     tilt      importance sampling scale factors for the rainfall model
+               [ rain probability , inches per rainfall , rainfall area ]
+               tilt = None samples the nominal rainfall model 
+     u         standard normal variables ( 5 x days ) from which the rain
+               occurrence, rain amount, rainfall area, population, and water
+               demand of each day are found, None to draw them here.
+               With u, the forcing is a deterministic function of u.
+
+     OUTPUTS   DESCRIPTION
+     t         the days of the water plant operation
+     w         environmental time series [ population ; temperature ; 
+                                           precipitation ; water_demand ]
+     RainFall  daily rainfall, inches
+     log_lr    log of the likelihood ratio of the nominal rainfall model
+               to the tilted rainfall model for this sample, 0 if tilt = None
+     log_area  log of the daily rainfall area, before it is limited to the 
+               watershed area, over its nominal median
+    """
+
+    avg_rpd  = constants[6]     # average rainfall per day, inches
+    T_r      = constants[7]     # rainfall return period
+    watershed_area = constants[8]     # watershed area
+
+    CCTS     = constants[22]    # climate change time scale
+    T_avg    = constants[23]    # 
+    T1       = constants[24]    # 
+    T7       = constants[26]    # 
+    Tc       = constants[27]    # climate change temperature rise
+    P1       = constants[28]    # population model linear    coefficient
+    P2       = constants[29]    # population model quadratic coefficient
+
+    Years    = constants[-2]    # duration of the analysis, years
+
+    #  Des-ti-ny!  Des-ti-ny!    No escaping!  That's for me!  - Gene Wilder
+    #  It is your DEStiney!   - Darth Vader
+
+    days = 365 * Years      # planned days of operation for the plant
+    t = np.arange(1, days + 1)   # the days of the water plant operation
+
+    # precipitation sequence  ...
+    Tr = T_r * (1 + (t / (CCTS * 365)))  # linearly increasing rain return period 
+    ipr = avg_rpd * Tr                   # average number of inches per rainfall
+    #     will it rain on any given day?   If so, how much?
+    if u is not None:
+        RainFall = (ndtr(u[0]) <= 1.0 / Tr) * gammainccinv(rain_shape, ndtr(-u[1])) * ipr / rain_shape
+        rainfall_area = 0.6 * watershed_area * np.exp(area_log_std * u[2])
+        log_lr = 0.0
+    elif tilt is None:
+        RainFall = (np.random.rand(days) <= 1.0 / Tr) * gamma.rnd(m=ipr, c=1.47, R=1, C=days) # <-------------- revise this line !!!
+
+        # rainfall_area is assumed to be un-correlated with rainfall amount 
+        rainfall_area = lognormal.rnd(medX=0.6 * watershed_area, covX=0.90, N=days)            # <-------------- revise this line !!!
+        log_lr = 0.0
+    else:
+        RainFall, rainfall_area, log_lr = tilted_rainfall(1.0 / Tr, ipr, 0.6 * watershed_area, tilt)
+    log_area = np.log(rainfall_area / (0.6 * watershed_area))
+    rainfall_area = np.minimum(rainfall_area, watershed_area)  # only catch in watershed
+    precipitation = rainfall_area * RainFall   # daily rainfall input, Mgal/day
+
+    # temperature sequence ...
+    temperature = T_avg - T1 * np.cos(2*np.pi*(t-15)/365) + T7*np.sin(2*np.pi*t/7/365) + Tc*t/(CCTS*365)
+    # dT = dlsym(0.5,Td,1.0,0.0,np.random.randn(days),d)  # random day-to-day temp variation
+    # T = T + dT   # add random day-to-day temperature variation
+
+    # population sequence ...
+    population = 100e3 + P1*(t/365) + P2*(t/365)**2 + 1500*(np.random.randn(days) if u is None else u[3])
+
+    # water demand sequence ...
+    gpppd = 100 + 0.4*(temperature - T_avg) + 5.0 * (np.random.randn(days) if u is None else u[4])
+    water_demand = population * gpppd / 1e6    # water demand, Mgal/day
+
+    # all environmental time series sequences ...
+    w = np.vstack([population, temperature, precipitation, water_demand])
+
+    return t, w, RainFall, log_lr, log_area
+
+
+def tilted_rainfall(p, ipr, med_area, tilt):
     """
-    cost = water_analysis( v , constants )
+    RainFall, rainfall_area, log_lr = tilted_rainfall( p , ipr , med_area , tilt )
+    sample daily rainfall from an importance sampling density in which 
+    the daily probability of rain, the mean inches per rainfall, and the 
+    median rainfall area of the nominal rainfall model are scaled by tilt.
+    The amount and the area of rain are tilted only on the days it rains,
+    so the dry days contribute only through the probability of rain.
+
+     INPUTS    DESCRIPTION
+     p         nominal daily probability of rain,  1/Tr
+     ipr       nominal average inches per rainfall
+     med_area  nominal median rainfall area, Mgal/in
+     tilt      scale factors [ rain probability , inches per rainfall , rainfall area ]
+
+     OUTPUTS   DESCRIPTION
+     RainFall       daily rainfall, inches
+     rainfall_area  daily rainfall area (not limited to the watershed area), Mgal/in
+     log_lr         log of the likelihood ratio, nominal / tilted, of this sample
+    """
+
+    days = len(p)
+    k    = rain_shape
+    s_a  = area_log_std
+    d_a  = np.log(tilt[2]) / s_a          # shift of the standardized log area
+
+    pq   = np.minimum(tilt[0] * p, 0.99)  # tilted probability of rain
+    rain = np.random.rand(days) <= pq
+
+    m_scale = np.where(rain, tilt[1], 1.0)
+    RainFall = rain * np.random.gamma(k, ipr * m_scale / k)
+    z = np.random.randn(days)
+    rainfall_area = med_area * np.exp(s_a * (z + rain * d_a))
+
+    # Bernoulli rain occurrence on every day ...
+    log_lr = np.sum(np.where(rain, np.log(p / pq), np.log((1 - p) / (1 - pq))))
+    # ... gamma rainfall amount and lognormal rainfall area on the rainy days
+    y = RainFall[rain] / ipr[rain]
+    log_lr += np.sum(k * np.log(tilt[1]) - k * y * (1 - 1 / tilt[1]))
+    log_lr += np.sum(-d_a * z[rain] - d_a**2 / 2)
+
+    return RainFall, rainfall_area, log_lr
+
+
+def water_simulate(v, constants, tilt=None, checkpoint=None, checkpoint_days=3650, dtype=None, forcing=None):
+    """
+    t, x, Q, w, RainFall, log_lr, cost = water_simulate( v , constants , tilt , checkpoint , checkpoint_days , dtype , forcing )
+    simulate the drinking water supply system over the full analysis duration
+    and return the complete time histories of the system 
+
+    With a checkpoint directory, the simulation is integrated in segments of
+    checkpoint_days days.  The forcing and the random number generator state
+    are saved once, in forcing.npz, and the states, flows and cost of each
+    segment are saved, as it is integrated, in a file of its own, so the
+    checkpoints of a long simulation take time in proportion to its length.
+    If the checkpoint directory exists, the simulation resumes after the last
+    saved segment, and gives the same result, bit for bit, as a run without
+    checkpoints.  The checkpoint directory is removed when the simulation
+    completes.
+
+    With a reduced precision dtype, such as np.float32, the forcing, the 
+    states and the flows are stored in that precision, and the states are 
+    rounded to it after every time step.  The derivatives are computed and
+    the cumulative cost is accumulated in float64, so this is a storage mode:
+    it reduces memory, not run time.  dtype = np.float64 reproduces the 
+    default (dtype = None) simulation.  See water_precision.py for its accuracy.
+
+     INPUTS    DESCRIPTION
+     v         design variables [ Vr_max , Vu_max , Vt_max , Qp_max ]
+     constants a set of many constants involved in this system
+     tilt      importance sampling scale factors for the rainfall model,
+               see water_forcing
+     checkpoint      checkpoint directory, None for no checkpoints
+     checkpoint_days days of simulation between checkpoints
+     dtype     reduced precision of the time series, None for float64
+     forcing   pre-determined ( t , w , RainFall , log_lr ) of water_forcing,
+               None to sample them here
+
+     OUTPUTS   DESCRIPTION
+     t         the days of the water plant operation
+     x         the 14 system states for each day
+     Q         the flows [ Qt ; Qs ; Qg ; Qe ; Qr ] for each day, Mgal/day
+     w         environmental time series, see water_forcing
+     RainFall  daily rainfall, inches
+     log_lr    log of the likelihood ratio of the rainfall sample, see water_forcing
+     cost      cost of operating water supply system, in float64
+    """
+
+    Vr_max = v[0]
+    Vu_max = v[1]
+    Vt_max = v[2]
+    Qp_max = v[3]
+
+    Vg_max   = constants[14]    # groundwater storage capacity
+    Cr       = constants[30]    # 
+    Cu       = constants[31]    # 
+    Ct       = constants[32]    # 
+
+    ode_constants = [v, *constants]
+
+    ckpt = None
+    if checkpoint is not None:
+        chash = water_constants_hash(constants)
+        dtype_name = np.dtype(dtype or float).name
+        ckpt = water_checkpoint_load(os.path.join(checkpoint, 'forcing.npz'))
+
+    if ckpt is not None:    # resume from the checkpoint
+        if not (np.array_equal(ckpt['v'], v) and str(ckpt['chash']) == chash):
+            raise ValueError(f'water_simulate: checkpoint {checkpoint} is for other design variables or constants')
+        if str(ckpt['dtype']) != dtype_name:
+            raise ValueError(f"water_simulate: checkpoint {checkpoint} is for dtype {ckpt['dtype']}, not {dtype_name}")
+        t, w, RainFall, log_lr = ckpt['t'], ckpt['w'], ckpt['RainFall'], float(ckpt['log_lr'])
+        np.random.set_state(ckpt['rng_state'])
+        day = 0
+        x = np.zeros((len(ckpt['x0']), len(t)), dtype=dtype or float)
+        Q = np.zeros((5, len(t)), dtype=dtype or float)
+        Z = np.zeros(len(t))
+        x[:, 0] = ckpt['x0']
+        Z[0] = ckpt['x0'][-1]
+        for seg in _checkpoint_segments(checkpoint):
+            day0 = int(seg['day0'])
+            if day0 != day:
+                break           # a gap after a lost segment, integrate again from day
+            day = int(seg['day'])
+            x[:, day0:day+1], Q[:, day0:day+1], Z[day0:day+1] = seg['x'], seg['Q'], seg['Z']
+
+    else:
+        if forcing is None:
+            forcing = water_forcing(constants, tilt)
+        t, w, RainFall, log_lr = forcing[:4]
+        if dtype is not None:
+            w = w.astype(dtype)
+
+        # initial volumes of water in various "containers"
+
+        Vg = 0.9 * Vg_max       # start with almost full ground water
+        Vr = 0.8 * Vr_max       # start with almost full reservoir 
+        Vu = 0.5 * Vu_max       # start with half full untreated water tank
+        Vt = 0.5 * Vt_max       # start with half full   treated water tank
+
+        Z  = 1 + 0.01*Vr_max + 0.5*Vu_max + 0.5*Vt_max + 0.1*Qp_max  # initial cost M$
+
+        x0 = np.array([Vg, Vr, Vu, Vt, *(Cr*Vr), *(Cu*Vu), *(Ct*Vt), Z])  # initial system state
+
+        if checkpoint is None:
+            x, Q, Z = _integrate(t, x0, w, ode_constants, dtype)
+            return t, x, Q, w, RainFall, log_lr, Z[-1]
+
+        day = 0
+        x = np.zeros((len(x0), len(t)), dtype=dtype or float)
+        Q = np.zeros((5, len(t)), dtype=dtype or float)
+        Z = np.zeros(len(t))
+        x[:, 0] = x0
+        Z[0] = x0[-1]
+
+        # the forcing is saved once
+        os.makedirs(checkpoint, exist_ok=True)
+        water_checkpoint_save(os.path.join(checkpoint, 'forcing.npz'), v=v, chash=chash, dtype=dtype_name,
+                              t=t, w=w, RainFall=RainFall, log_lr=log_lr, x0=x0)
+
+    # integrate segment by segment, saving each segment as it is integrated
+    while day < len(t) - 1:
+        end = min(day + checkpoint_days, len(t) - 1)
+        x0 = x[:, day].astype(float)
+        x0[-1] = Z[day]
+        x[:, day:end+1], Q[:, day:end+1], Z[day:end+1] = _integrate(t[day:end+1], x0, w[:, day:end+1],
+                                                                    ode_constants, dtype)
+        water_checkpoint_save(os.path.join(checkpoint, f'segment-{day:06d}-{end:06d}.npz'), day0=day, day=end,
+                              x=x[:, day:end+1], Q=Q[:, day:end+1], Z=Z[day:end+1])
+        day = end
+    shutil.rmtree(checkpoint)
+
+    return t, x, Q, w, RainFall, log_lr, Z[-1]
+
+
+def _checkpoint_segments(checkpoint):
+    """
+    the segments saved in the checkpoint directory, in the order of their days
+    """
+
+    for path in sorted(glob.glob(os.path.join(checkpoint, 'segment-*.npz'))):
+        yield water_checkpoint_load(path)
+
+
+def _integrate(t, x0, w, ode_constants, dtype):
+    """
+    x, Q, Z = _integrate( t , x0 , w , ode_constants , dtype )
+    integrate the water system from x0 over times t with ode4u, or, for a
+    reduced precision dtype, with the same fourth-order Runge-Kutta steps as
+    ode4u, in which the states are rounded to dtype after each step and the
+    cumulative cost Z is kept in float64.  The derivatives are computed in
+    float64, so dtype reduces the memory of the time series, not the run time.
+    """
+
+    if dtype is None:
+        t, x, dxdt, Q = ode4u(water_system, t, x0, u=w, c=ode_constants)
+        return x, Q, x[-1, :]
+
+    n = len(t)
+    x = np.zeros((len(x0), n), dtype=dtype)
+    Z = np.zeros(n)
+
+    xp = np.array(x0, dtype=float)
+    xp[:-1] = xp[:-1].astype(dtype)
+    dxdt, Qp = water_system(t[0], xp, w[:, 0], ode_constants)
+    Q = np.zeros((len(Qp), n), dtype=dtype)
+    x[:, 0], Q[:, 0], Z[0] = xp, Qp, xp[-1]
+
+    for p in range(n - 1):
+        xp = rk4_step(t[p], xp, t[p+1] - t[p], w[:, p], w[:, p+1], ode_constants, dxdt)
+        xp[:-1] = xp[:-1].astype(dtype)     # states stored in reduced precision, cost in float64
+        dxdt, Qp = water_system(t[p+1], xp, w[:, p+1], ode_constants)
+        x[:, p+1], Q[:, p+1], Z[p+1] = xp, Qp, xp[-1]
+
+    return x, Q, Z
+
+
+def rk4_step(t, x, dt, w0, w1, ode_constants, dxdt=None):
+    """
+    x = rk4_step( t , x , dt , w0 , w1 , ode_constants , dxdt )
+    one fourth-order Runge-Kutta step of water_system from time t to t+dt,
+    with the same arithmetic as ode4u:  the forcing w0 at the start and the
+    middle of the step, and the forcing w1 at its end.
+    dxdt is the state derivative at the start of the step, if known.
+    """
+
+    dt2 = dt / 2
+    k1 = water_system(t, x, w0, ode_constants)[0] if dxdt is None else dxdt
+    k2 = water_system(t + dt2, x + k1*dt2, w0, ode_constants)[0]
+    k3 = water_system(t + dt2, x + k2*dt2, w0, ode_constants)[0]
+    k4 = water_system(t + dt,  x + k3*dt,  w1, ode_constants)[0]
+
+    return x + dt*(k1 + 2*k2 + 2*k3 + k4)/6
+
+
+def water_analysis(v, constants, checkpoint=None, dtype=None, trajectories=False):
+    """
+    cost, constraint = water_analysis( v , constants , checkpoint , dtype )
+    cost, constraint, x, Q = water_analysis( v , constants , checkpoint , dtype , trajectories=True )
     simulate the behavior of the drinking water supply system as described in
     the provided m-function: water_supply.m
     and controlled by the controller as described in the m-function:
@@ -18,10 +351,16 @@ def water_analysis(v, constants):
      v[1]    Vu_max  volume of the untreated water tank           Mgal
      v[2]    Vt_max  volume of the treated water tank             Mgal
      v[3]    Qp_max  max. flow through the water treatment plant  Mgal/day
+     v[4:9]  optional controller gains, see my_water_control.py
      constants a set of many constants involved in this system
+     checkpoint  optional checkpoint directory for long simulations, see water_simulate
+     dtype     optional reduced precision, e.g. np.float32, see water_simulate
+     trajectories  also return the states x and flows Q, see water_simulate
     
      OUTPUTS   DESCRIPTION
      cost      cost of operating water supply system for fifty years
+     constraint  constraints of the design, feasible if <= 0
+     x , Q     states and flows for each day, if trajectories is True
     """
 
     # --------- READ, BUT DO NOT CHANGE ANYTHING IN THIS FILE -------------
@@ -60,70 +399,21 @@ def water_analysis(v, constants):
     Pf       = constants[20]    # penalty cost for flooding downstream
 
     CCTS     = constants[22]    # climate change time scale
-    T_avg    = constants[23]    # 
-    T1       = constants[24]    # 
-    Td       = constants[26]    # 
-    T7       = constants[26]    # 
     Tc       = constants[27]    # climate change temperature rise
-    P1       = constants[28]    # population model linear    coefficient
     P2       = constants[29]    # population model quadratic coefficient
-    Cr       = constants[30]    # 
-    Cu       = constants[31]    # 
-    Ct       = constants[32]    # 
 
     Years    = constants[-2]    # duration of the analysis, years
     Plots    = constants[-1]    # 1: draw plots, 0: don't draw plots
 
-    #  pre-determine time series sequences for:
+    #  simulate the system with pre-determined time series sequences for:
     #  precipitation, temperature, population, and consumption 
-    #  Des-ti-ny!  Des-ti-ny!    No escaping!  That's for me!  - Gene Wilder
-    #  It is your DEStiney!   - Darth Vader
 
     days = 365 * Years      # planned days of operation for the plant
-    t = np.arange(1, days + 1)   # the days of the water plant operation
-
-    # precipitation sequence  ...
-    Tr = T_r * (1 + (t / (CCTS * 365)))  # linearly increasing rain return period 
-    ipr = avg_rpd * Tr                   # average number of inches per rainfall
-    #     will it rain on any given day?   If so, how much?
-    RainFall = (np.random.rand(days) <= 1.0 / Tr) * gamma.rnd(m=ipr, c=1.47, R=1, C=days) # <-------------- revise this line !!!
-
-    # rainfall_area is assumed to be un-correlated with rainfall amount 
-    rainfall_area = lognormal.rnd(medX=0.6 * watershed_area, covX=0.90, N=days)            # <-------------- revise this line !!!
-    rainfall_area = np.minimum(rainfall_area, watershed_area)  # only catch in watershed
-    precipitation = rainfall_area * RainFall   # daily rainfall input, Mgal/day
-
-    # temperature sequence ...
-    temperature = T_avg - T1 * np.cos(2*np.pi*(t-15)/365) + T7*np.sin(2*np.pi*t/7/365) + Tc*t/(CCTS*365)
-    # dT = dlsym(0.5,Td,1.0,0.0,np.random.randn(days),d)  # random day-to-day temp variation
-    # T = T + dT   # add random day-to-day temperature variation
-
-    # population sequence ...
-    population = 100e3 + P1*(t/365) + P2*(t/365)**2 + 1500*np.random.randn(days)
-
-    # water demand sequence ...
-    gpppd = 100 + 0.4*(temperature - T_avg) + 5.0 * np.random.randn(days)
-    water_demand = population * gpppd / 1e6    # water demand, Mgal/day
-
-    # all environmental time series sequences ...
-    w = np.vstack([population, temperature, precipitation, water_demand])
 
+    t, x, Q, w, RainFall, _, cost = water_simulate(v, constants, checkpoint=checkpoint, dtype=dtype)
 
-    # initial volumes of water in various "containers"
-
-    Vg = 0.9 * Vg_max       # start with almost full ground water
-    Vr = 0.8 * Vr_max       # start with almost full reservoir 
-    Vu = 0.5 * Vu_max       # start with half full untreated water tank
-    Vt = 0.5 * Vt_max       # start with half full   treated water tank
-
-    Z  = 1 + 0.01*Vr_max + 0.5*Vu_max + 0.5*Vt_max + 0.1*Qp_max  # initial cost M$
-
-    x0 = np.array([Vg, Vr, Vu, Vt, *(Cr*Vr), *(Cu*Vu), *(Ct*Vt), Z])  # initial system state
-
-    ode_constants = [v, *constants]
-    t, x, dxdt, Q = ode4u(water_system, t, x0, u=w, c=ode_constants)
-
-    cost = x[13, days - 1]
+    population    = w[0, :]
+    water_demand  = w[3, :]
 
     # plant may not process more water than it can hold. 
     constraint = np.array([1.2*Qp_max / Vu_max - 1,
@@ -133,6 +423,8 @@ def water_analysis(v, constants):
     if Plots:  # ----------------------------------------------------------------
         # display plots to show how your plant design and control plan worked out
 
+        diag = water_diagnostics(v, constants, x, Q, RainFall)
+
         x[x < 10*np.finfo(float).eps] = np.nan
         Q[Q < 10*np.finfo(float).eps] = np.nan
 
@@ -142,14 +434,13 @@ def water_analysis(v, constants):
         Qe = Q[3, :]                    # evaporation from reservoir, Mgal / day
         Qr = Q[4, :]                    # river flow,                 Mgal / day
 
+        Tr = T_r * (1 + (t / (CCTS * 365)))  # linearly increasing rain return period 
+        ipr = avg_rpd * Tr                   # average number of inches per rainfall
+
         Cs = Cs_base[:, None] + cp[:, None] * population + cs[:, None] * Qs  # or** (HPG): Cs = Cs_base + cp*population + cs*Qs    # streamflow contaminant concentrations
         Cs[Cs < 1e-3] = 1e-2
 
-        # compute the one-year precipitation index 
-        SPI = np.full(days, np.nan)
-        n = int(1.0 * 365)  # one year of data
-        for d in range(n, days):
-            SPI[d] = np.sum(RainFall[d:d-n:-1]) - avg_rpd * n
+        SPI = diag['SPI']       # one-year precipitation index
 
         year = t / 365 + 2025
 
@@ -179,7 +470,7 @@ def water_analysis(v, constants):
         plt.axis([2025, 2025 + Years, 0, 1.0])
         plt.title(f'CCTS = {CCTS:.0f}y, Tc={Tc:4.1f} deg.F, P_2={P2:4.1f}, C_c={Cc*100:4.2f}%, cost={cost:.0f} M$')
         plt.subplot(312)
-        plt.plot(year, np.cumsum(precipitation / rainfall_area))
+        plt.plot(year, np.cumsum(RainFall))
         plt.plot(year, np.cumsum(Qt / watershed_area))
         plt.ylabel('cumulative Tgal')
         plt.legend(['cumulative precipitation', 'cumulative transpiration'], loc='upper left')
@@ -274,9 +565,9 @@ def water_analysis(v, constants):
         plt.draw()
         plt.pause(0.001)
 
-        dirty_water_days = np.where(np.sum(x[10:13, :] / (np.ones((3, 1)) * x[3, :]) > Ct_allow.reshape(-1, 1), axis=0))[0]
-        out_of_water_days = np.where(x[3, :] < 0.11 * Vt_max)[0]
-        flooded_river_days = np.where(Qr > 5e3)[0]
+        dirty_water_days = np.where(diag['dirty_days'])[0]
+        out_of_water_days = np.where(diag['empty_days'])[0]
+        flooded_river_days = np.where(diag['flood_days'])[0]
         # treated_tank_volumes = x[3, out_of_water_days]
         # flood_flow = Qr[flooded_river_days]
 
@@ -295,6 +586,8 @@ def water_analysis(v, constants):
 
     # ------------------------------------------ Plots
 
+    if trajectories:
+        return cost, constraint, x, Q
     return cost, constraint
 
 # water_analysis ============================================================
@@ -0,0 +1,77 @@
+# water_batch.py
+# evaluate batches of water supply system simulations in parallel processes
+
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from water_analysis import water_analysis
+
+
+def water_batch(V, constants, seeds=None, n_workers=None, chunksize=None, dtype=None):
+    """
+    cost, constraint = water_batch( V , constants , seeds , n_workers , chunksize , dtype )
+    evaluate water_analysis for a batch of designs in parallel processes
+
+     INPUTS     DESCRIPTION
+     V          designs, one per row  (N x 4)
+     constants  a set of constants for all designs, or a list of N sets of
+                constants, one for each design
+     seeds      random number generator seed for each design.  Using the
+                same seed for every design gives common random numbers.
+                None for no seeding
+     n_workers  number of worker processes, None for one per processor,
+                1 to evaluate the batch serially in this process
+     chunksize  number of designs sent to a worker at once,
+                None for about four chunks per worker
+     dtype      reduced precision of the simulations, e.g. np.float32,
+                None for float64, see water_simulate
+
+     OUTPUTS    DESCRIPTION
+     cost       cost of each design                 (N)
+     constraint constraints of each design          (N x 2)
+    """
+
+    V = np.atleast_2d(V)
+    N = V.shape[0]
+
+    if not isinstance(constants[0], list):
+        constants = [constants] * N
+    if seeds is None:
+        seeds = [None] * N
+
+    tasks = [(V[i], constants[i], seeds[i], dtype) for i in range(N)]
+
+    if n_workers is None:
+        n_workers = os.cpu_count()
+    if chunksize is None:
+        chunksize = max(1, N // (4 * n_workers))
+
+    if n_workers == 1:
+        results = list(map(water_evaluate, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            results = list(pool.map(water_evaluate, tasks, chunksize=chunksize))
+
+    cost = np.array([r[0] for r in results])
+    constraint = np.array([r[1] for r in results])
+
+    return cost, constraint
+
+
+def water_evaluate(task):
+    """
+    cost, constraint = water_evaluate( task )
+    one evaluation of water_analysis without plots, for task = ( v , constants , seed , dtype )
+    """
+
+    v, constants, seed, dtype = task
+
+    constants = list(constants)
+    constants[-1] = 0           # no plots
+
+    if seed is not None:
+        np.random.seed(seed)
+
+    return water_analysis(v, constants, dtype=dtype)
+
+# water_batch ----------------------------------------------------- 2026-10-19
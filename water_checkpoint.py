@@ -0,0 +1,47 @@
+# water_checkpoint.py
+# atomic checkpoints of long simulations and Monte Carlo campaigns,
+# including the state of the numpy random number generator
+
+import os
+import numpy as np
+
+
+def water_checkpoint_save(path, **arrays):
+    """
+    water_checkpoint_save( path , **arrays )
+    save arrays and the state of the random number generator to the .npz
+    file path.  The file is written to a temporary file and renamed into
+    place, so an interrupted save leaves the previous checkpoint intact.
+    """
+
+    name, keys, pos, has_gauss, cached_gaussian = np.random.get_state()
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.savez(f, rng_keys=keys, rng_pos=pos, rng_has_gauss=has_gauss,
+                 rng_cached_gaussian=cached_gaussian, **arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def water_checkpoint_load(path):
+    """
+    ckpt = water_checkpoint_load( path )
+    load a checkpoint saved by water_checkpoint_save, None if there is none.
+    ckpt['rng_state'] restores the random number generator with
+    np.random.set_state(ckpt['rng_state'])
+    """
+
+    if not os.path.exists(path):
+        return None
+
+    with np.load(path) as f:
+        ckpt = {key: f[key] for key in f.files}
+
+    ckpt['rng_state'] = ('MT19937', ckpt.pop('rng_keys'), int(ckpt.pop('rng_pos')),
+                         int(ckpt.pop('rng_has_gauss')), float(ckpt.pop('rng_cached_gaussian')))
+
+    return ckpt
+
+# water_checkpoint ------------------------------------------------ 2026-10-19
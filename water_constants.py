@@ -3,6 +3,8 @@
 # constants used in the water supply and treatment project
 # do not change any values in this file
 
+import re
+import hashlib
 import numpy as np
 
 
@@ -99,4 +101,92 @@ def water_constants():
         Cr, Cu, Ct, Years, Plots
     ]
 
-    return analysis_constants
\ No newline at end of file
+    return analysis_constants
+
+
+def water_constants_names():
+    """
+    Returns the names of the constants, in the order of water_constants().
+    """
+
+    return [
+        'alpha_t', 'beta_t', 'alpha_s', 'alpha_g', 'alpha_e', 'beta_e', 'avg_rpd', 'T_r',
+        'watershed_area', 'Cs_base', 'cp', 'cs', 'cr', 'Cc', 'Vg_max', 'Qr_min', 'R', 'Ct_allow',
+        'Pc', 'Pv', 'Pf', 'operating_cost', 'CCTS', 'T_avg', 'T1', 'Td', 'T7', 'Tc', 'P1', 'P2',
+        'Cr', 'Cu', 'Ct', 'Years', 'Plots'
+    ]
+
+
+design_vars_names = ['Vr_max', 'Vu_max', 'Vt_max', 'Qp_max']
+
+# controller gains, optional design variables after Qp_max, see my_water_control.py
+control_gains_names = ['a_u', 'a_p', 's_1', 's_2', 's_3']
+control_gains_default = [2, 2, 1, 1, 1]
+
+
+def water_constants_set(constants, v, names, values):
+    """
+    Returns copies of the constants and the design variables with named entries
+    set to new values.  The originals are not changed.
+
+    Args:
+        constants: list of constants from water_constants()
+        v: design variables [Vr_max, Vu_max, Vt_max, Qp_max], and optionally
+           the controller gains [a_u, a_p, s_1, s_2, s_3]
+        names: list of names of constants ('beta_e'), of entries of constant
+               arrays ('R[0,2]', 'Cs_base[1]'), of design variables ('Vr_max'),
+               or of controller gains ('a_p')
+        values: list of values, one for each name
+
+    Returns:
+        constants: copy of the constants with the named entries set
+        v: copy of the design variables with the named entries set
+    """
+
+    constants = list(constants)
+    v = np.array(v, dtype=float)
+    all_names = water_constants_names()
+
+    for name, value in zip(names, values):
+        if name in design_vars_names:
+            v[design_vars_names.index(name)] = value
+            continue
+        if name in control_gains_names:
+            if len(v) < 9:      # append the default gains
+                v = np.concatenate([v[:4], control_gains_default])
+            v[4 + control_gains_names.index(name)] = value
+            continue
+        match = re.fullmatch(r'(\w+)\[([\d,\s]+)\]', name)
+        base = match.group(1) if match else name
+        if base not in all_names:
+            raise ValueError(f'water_constants_set: unknown constant {name}')
+        i = all_names.index(base)
+        if match:
+            idx = tuple(int(j) for j in match.group(2).split(','))
+            constants[i] = np.array(constants[i], dtype=float)   # copy
+            constants[i][idx] = value
+        else:
+            constants[i] = value
+
+    return constants, v
+
+
+def water_constants_hash(constants):
+    """
+    Returns a short hash identifying the values of the constants.  The Plots
+    flag does not change the results of a simulation and is not hashed.
+
+    Args:
+        constants: list of constants from water_constants()
+
+    Returns:
+        chash: 16 character hexadecimal hash string
+    """
+
+    h = hashlib.sha1()
+    for c in constants[:-1]:
+        c = np.asarray(c, dtype=float)
+        h.update(str(c.shape).encode())
+        h.update(c.tobytes())
+
+    return h.hexdigest()[:16]
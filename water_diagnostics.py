@@ -0,0 +1,162 @@
+# water_diagnostics.py
+# diagnostics of simulations of the water supply system:  the one-year
+# precipitation index, the days of dirty water, of running out of water, and
+# of flooding, their counts in each year, and the reliability and resilience
+# of the system with respect to each of them
+#
+# the diagnostics are computed from the time series of water_simulate, for one
+# simulation ( x is 14 x days ) or for an ensemble ( x is NS x 14 x days ),
+# without drawing plots.  water_diagnostics_plot draws a summary.
+
+import numpy as np
+
+events = ['dirty', 'empty', 'flood', 'supply']
+
+
+def water_spi(RainFall, avg_rpd, n=365):
+    """
+    SPI = water_spi( RainFall , avg_rpd , n )
+    the n-day precipitation index:  the rainfall of the last n days less its
+    average, for each day from day n on, and NaN before day n
+
+     INPUTS     DESCRIPTION
+     RainFall   daily rainfall, inches,  days  or  NS x days
+     avg_rpd    average rainfall per day, inches
+     n          number of days of the index                      default 365
+
+     OUTPUTS    DESCRIPTION
+     SPI        n-day precipitation index, inches, same shape as RainFall
+    """
+
+    RainFall = np.asarray(RainFall, dtype=float)
+    c = np.cumsum(RainFall, axis=-1)
+
+    SPI = np.full(RainFall.shape, np.nan)
+    SPI[..., n:] = c[..., n:] - c[..., :-n] - avg_rpd * n
+
+    return SPI
+
+
+def water_diagnostics(v, constants, x, Q, RainFall=None):
+    """
+    diag = water_diagnostics( v , constants , x , Q , RainFall )
+    days of dirty water, out of water, and flooding, and the reliability and
+    resilience of the water supply system, for one simulation or an ensemble
+
+     INPUTS     DESCRIPTION
+     v          design variables [ Vr_max , Vu_max , Vt_max , Qp_max ],
+                or NS x 4 design variables of an ensemble
+     constants  a set of many constants involved in this system
+     x          system states,  14 x days  or  NS x 14 x days
+     Q          flows [ Qt ; Qs ; Qg ; Qe ; Qr ],  5 x days  or  NS x 5 x days
+     RainFall   daily rainfall, inches,  days  or  NS x days  (optional)
+
+     OUTPUTS    DESCRIPTION
+     diag       dictionary of, for each event in
+                  'dirty'   treated water above an allowable concentration
+                  'empty'   treated water volume below 0.11 Vt_max
+                  'flood'   river flow above 5e3 Mgal/day
+                  'supply'  dirty or empty
+       '<event>_days'         True on each day of the event,  ( NS x ) days
+       '<event>_per_year'     number of days of the event in each year,
+                              ( NS x ) Years
+       '<event>_reliability'  fraction of days without the event
+       '<event>_resilience'   fraction of days of the event followed by a
+                              day without it, NaN if the event never occurs
+     and, if RainFall is given,
+       'SPI'                  one-year precipitation index, see water_spi
+    """
+
+    Ct_allow = constants[17]    # allowable treated water contaminant concentrations
+    avg_rpd  = constants[6]     # average rainfall per day, inches
+
+    x = np.asarray(x)
+    Q = np.asarray(Q)
+    Vt_max = np.asarray(v, dtype=float)[..., 2, None]
+    days = x.shape[-1]
+
+    Vt = x[..., 3, :]
+    Mt = x[..., 10:13, :]       # treated water contaminant masses
+
+    diag = {}
+    diag['dirty_days']  = np.any(Mt > Ct_allow[:, None] * Vt[..., None, :], axis=-2) & (Vt > 10*np.finfo(float).eps)
+    diag['empty_days']  = Vt < 0.11 * Vt_max
+    diag['flood_days']  = Q[..., 4, :] > 5e3
+    diag['supply_days'] = diag['dirty_days'] | diag['empty_days']
+
+    for event in events:
+        fail = diag[event + '_days']
+        diag[event + '_per_year'] = np.sum(fail[..., :days // 365 * 365].reshape(*fail.shape[:-1], -1, 365), axis=-1)
+        diag[event + '_reliability'] = 1 - np.mean(fail, axis=-1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            diag[event + '_resilience'] = (np.sum(fail[..., :-1] & ~fail[..., 1:], axis=-1)
+                                           / np.sum(fail[..., :-1], axis=-1))
+
+    if RainFall is not None:
+        diag['SPI'] = water_spi(RainFall, avg_rpd)
+
+    return diag
+
+
+def water_diagnostics_plot(diag, fig_no=5):
+    """
+    water_diagnostics_plot( diag , fig_no )
+    plot the number of days of each event in each year, and the reliability
+    and resilience of each event, over the simulations of an ensemble
+    """
+
+    import matplotlib.pyplot as plt
+
+    labels = {'dirty': 'dirty water', 'empty': 'out of water', 'flood': 'flooded river', 'supply': 'supply failure'}
+
+    plt.figure(fig_no)
+    plt.clf()
+    for i, event in enumerate(['dirty', 'empty', 'flood']):
+        per_year = np.atleast_2d(diag[event + '_per_year'])
+        year = 2025 + np.arange(per_year.shape[-1])
+        plt.subplot(3, 1, i + 1)
+        plt.plot(year, np.mean(per_year, axis=0), '-k')
+        if per_year.shape[0] > 1:
+            plt.fill_between(year, np.percentile(per_year, 5, axis=0), np.percentile(per_year, 95, axis=0),
+                             color='0.8')
+        reliability = np.mean(diag[event + '_reliability'])
+        resilience = np.nanmean(diag[event + '_resilience']) if np.any(diag[event + '_days']) else np.nan
+        plt.ylabel('days / year')
+        plt.title(f'{labels[event]}:  reliability = {reliability:.4f},  resilience = {resilience:.3f}')
+    plt.xlabel('year')
+
+    plt.draw()
+    plt.pause(0.001)
+
+
+if __name__ == '__main__':
+
+    from water_constants import water_constants
+    from water_analysis import water_simulate
+
+    #              Vr,max Vu,max Vt,max Qp,max
+    v = np.array([ 10000 ,  500 ,  500 ,  200 ])
+
+    analysis_constants = water_constants()
+    analysis_constants[-2] = 50             # 50 year simulation
+
+    NS = 10
+    x, Q, RainFall = [], [], []
+    for sim in range(NS):
+        np.random.seed(sim)
+        _, xs, Qs, _, RainFalls, _, _ = water_simulate(v, analysis_constants)
+        x.append(xs)
+        Q.append(Qs)
+        RainFall.append(RainFalls)
+
+    diag = water_diagnostics(v, analysis_constants, np.array(x), np.array(Q), np.array(RainFall))
+
+    for event in events:
+        resilience = np.nanmean(diag[event + '_resilience']) if np.any(diag[event + '_days']) else np.nan
+        print(f' {event:>6s}:  reliability = {np.mean(diag[event + "_reliability"]):.4f}'
+              f'  resilience = {resilience:.3f}'
+              f'  days per year = {np.mean(diag[event + "_per_year"]):.2f}')
+
+    water_diagnostics_plot(diag)
+
+# water_diagnostics ----------------------------------------------- 2026-10-19
@@ -0,0 +1,194 @@
+# water_hourly.py
+# sub-daily (hourly) simulation of the water supply system
+#
+# the daily environmental time series of water_forcing are disaggregated
+# into hours as they are needed:  a diurnal temperature cycle of amplitude
+# Td, a diurnal water demand profile, and each day's rainfall falling in a
+# storm of random start and duration with a triangular intensity profile.
+# Each day's rainfall, temperature and demand are preserved.
+#
+# the simulation is multi-rate.  Each day is first integrated in one daily
+# step.  If a storage crosses, or comes within a margin of, a threshold of the
+# flow laws in water_system.py during the day, or the river flow at the start
+# or the end of the day is within reach of the flood flow, the daily step is
+# rejected and the day is integrated in 24 hourly steps instead.  Only daily
+# values are kept, with the largest river flow of each day, so the memory is
+# that of the daily model and the run time is close to it when few days are
+# refined.
+
+import numpy as np
+from water_system import water_system
+from water_analysis import water_forcing, rk4_step
+
+
+# the thresholds of the flow laws in water_system.py for overflows, flood
+# releases, and the supply penalty, as fractions of the capacity of the
+# ground water, reservoir, untreated and treated volumes.  The low-volume
+# cut-offs, at which the controlled system often rests, are not refined.
+thresholds = [np.array([1.0]),
+              np.array([0.8, 1.0]),
+              np.array([1.0]),
+              np.array([0.11, 1.0])]
+
+# diurnal water demand profile, morning and evening peaks, average of 1
+hour = np.arange(24)
+demand_profile = 1 + 0.3*np.cos(2*np.pi*(hour - 19)/24) + 0.2*np.cos(4*np.pi*(hour - 7)/24)
+
+
+def water_hourly(v, constants, tilt=None, refine='auto', margin=0.01, storm_hours=6):
+    """
+    t, x, Q, w, RainFall, Qr_max, fine, cost = water_hourly( v , constants , tilt , refine , margin , storm_hours )
+    simulate the drinking water supply system with hourly time steps on the
+    days that need them
+
+     INPUTS       DESCRIPTION
+     v            design variables [ Vr_max , Vu_max , Vt_max , Qp_max ]
+     constants    a set of many constants involved in this system
+     tilt         importance sampling scale factors for the rainfall model,
+                  see water_forcing
+     refine       'auto'   hourly steps on days near a threshold  (multi-rate)
+                  'always' hourly steps on every day
+                  'never'  daily steps on every day, as water_simulate
+     margin       a day is refined if a volume passes within margin*capacity
+                  of a threshold during its daily step            default 0.01
+     storm_hours  average duration of a storm, hours             default 6
+
+     OUTPUTS      DESCRIPTION
+     t            the days of the water plant operation
+     x            the 14 system states at the start of each day
+     Q            the flows [ Qt ; Qs ; Qg ; Qe ; Qr ] at the start of each day
+     w            daily environmental time series, see water_forcing
+     RainFall     daily rainfall, inches
+     Qr_max       largest river flow of each day, Mgal/day
+     fine         True for each day integrated in hourly steps
+     cost         cost of operating water supply system
+    """
+
+    Vr_max = v[0]
+    Vu_max = v[1]
+    Vt_max = v[2]
+    Qp_max = v[3]
+
+    Vg_max   = constants[14]
+    Td       = constants[25]    # daily temperature variation
+    Cr       = constants[30]
+    Cu       = constants[31]
+    Ct       = constants[32]
+
+    t, w, RainFall, _, _ = water_forcing(constants, tilt)
+    days = len(t)
+
+    # the start hour and duration of the storm of each day
+    storm_start = np.random.randint(0, 24, days)
+    storm_length = np.minimum(np.random.geometric(1.0 / storm_hours, days), 24)
+
+    capacity = np.array([Vg_max, Vr_max, Vu_max, Vt_max])
+
+    Z  = 1 + 0.01*Vr_max + 0.5*Vu_max + 0.5*Vt_max + 0.1*Qp_max  # initial cost M$
+    xd = np.array([0.9*Vg_max, 0.8*Vr_max, 0.5*Vu_max, 0.5*Vt_max,
+                   *(Cr*0.8*Vr_max), *(Cu*0.5*Vu_max), *(Ct*0.5*Vt_max), Z])
+
+    ode_constants = [v, *constants]
+    x = np.zeros((len(xd), days))
+    Q = np.zeros((5, days))
+    Qr_max = np.zeros(days)
+    fine = np.zeros(days, dtype=bool)
+
+    step = None                 # derivative and flows at the end of an accepted daily step
+    for d in range(days):
+        dxdt, Qd = step if step is not None else water_system(t[d], xd, w[:, d], ode_constants)
+        step = None
+        x[:, d], Q[:, d] = xd, Qd
+        if d == days - 1:
+            Qr_max[d] = Qd[4]
+            break
+
+        if refine != 'always':            # one daily step
+            x_next = rk4_step(t[d], xd, 1.0, w[:, d], w[:, d+1], ode_constants, dxdt)
+            step_next = water_system(t[d+1], x_next, w[:, d+1], ode_constants)
+            if refine == 'auto':
+                fine[d] = (_crosses_threshold(xd[0:4], x_next[0:4], capacity, margin)
+                           or max(Qd[4], step_next[1][4]) > 0.5 * 5e3)
+            if not fine[d]:
+                xd, step = x_next, step_next
+                Qr_max[d] = Qd[4]
+                continue
+        fine[d] = True
+
+        # hourly forcing for day d, and the first hour of day d+1 ...
+        wh = np.c_[_hourly_forcing(w[:, d], Td, storm_start[d], storm_length[d]),
+                   _hourly_forcing(w[:, d+1], Td, storm_start[d+1], storm_length[d+1])[:, 0]]
+
+        Qr_max[d] = 0.0
+        for h in range(24):               # ... and 24 hourly steps
+            dxdt, Qh = water_system(t[d] + h/24, xd, wh[:, h], ode_constants)
+            Qr_max[d] = max(Qr_max[d], Qh[4])
+            xd = rk4_step(t[d] + h/24, xd, 1/24, wh[:, h], wh[:, h+1], ode_constants, dxdt)
+
+    return t, x, Q, w, RainFall, Qr_max, fine, x[13, -1]
+
+
+def _hourly_forcing(w, Td, start, length):
+    """
+    the forcing of each hour of a day ( 4 x 24 ) from the daily forcing w,
+    with a diurnal temperature cycle and demand profile, and the day's
+    rainfall in a storm of length hours from the start hour
+    """
+
+    wh = np.zeros((4, 24))
+    wh[0, :] = w[0]
+    wh[1, :] = w[1] + Td * np.cos(2*np.pi*(hour - 15)/24)
+    wh[2, :] = w[2] * 24 * _storm_profile(start, length)
+    wh[3, :] = w[3] * demand_profile
+
+    return wh
+
+
+def _crosses_threshold(V0, V1, capacity, margin):
+    """
+    True if any volume passes within margin*capacity of a threshold of the
+    flow laws going from V0 to V1
+    """
+
+    for i in range(4):
+        lo = min(V0[i], V1[i]) - margin * capacity[i]
+        hi = max(V0[i], V1[i]) + margin * capacity[i]
+        if np.any((lo < thresholds[i] * capacity[i]) & (thresholds[i] * capacity[i] < hi)):
+            return True
+
+    return False
+
+
+def _storm_profile(start, length):
+    """
+    hourly fractions of a day's rainfall in a storm of length hours from the
+    start hour, with a triangular intensity, within the day
+    """
+
+    start = min(start, 24 - length)
+    k = np.arange(1, length + 1)
+    profile = np.zeros(24)
+    profile[start:start + length] = np.minimum(k, length + 1 - k)
+
+    return profile / np.sum(profile)
+
+
+if __name__ == '__main__':
+
+    from time import time
+    from water_constants import water_constants
+
+    #              Vr,max Vu,max Vt,max Qp,max
+    v = np.array([ 10000 ,  500 ,  500 ,  200 ])
+
+    analysis_constants = water_constants()
+    analysis_constants[-2] = 50             # 50 year simulation
+
+    for refine in ['never', 'auto']:
+        np.random.seed(1)
+        start_time = time()
+        t, x, Q, w, RainFall, Qr_max, fine, cost = water_hourly(v, analysis_constants, refine=refine)
+        print(f' {refine:>6s}: cost = {cost:6.1f} M$,  {np.mean(fine)*100:5.1f}% of days hourly,'
+              f'  {np.sum(Qr_max > 5e3)} flood days,  {time() - start_time:5.1f} s')
+
+# water_hourly ---------------------------------------------------- 2026-10-19
@@ -0,0 +1,85 @@
+# water_joint_opt.py
+# optimize the design of the water treatment system together with the gains
+# of its controller  [ Vr_max, Vu_max, Vt_max, Qp_max, a_u, a_p, s_1, s_2, s_3 ]
+# see my_water_control.py for the controller gains
+#
+# differential evolution evaluates a whole population of candidates at once,
+# and each population is simulated in parallel by water_batch.  Every
+# candidate is simulated with the same scenario seeds (common random numbers),
+# so candidates are compared on the same rainfall, temperature and demand.
+
+import numpy as np
+from scipy.optimize import differential_evolution
+from water_batch import water_batch
+
+
+def water_joint_opt(v_lb, v_ub, constants, n_scenarios=4, seed=0, n_workers=None,
+                    maxiter=50, popsize=10, penalty=1000):
+    """
+    v_opt, f_opt, g_opt, cvg_hst = water_joint_opt( v_lb , v_ub , constants , n_scenarios , seed , n_workers , maxiter , popsize , penalty )
+
+     INPUTS      DESCRIPTION
+     v_lb, v_ub  lower and upper bounds of the design variables and gains
+     constants   a set of many constants involved in this system
+     n_scenarios number of scenario seeds each candidate is simulated with
+     seed        seed of the scenario seeds and of the optimizer
+     n_workers   number of worker processes, see water_batch
+     maxiter     maximum number of generations
+     popsize     population size, as a multiple of the number of variables
+     penalty     penalty factor on the squared constraint violations
+
+     OUTPUTS     DESCRIPTION
+     v_opt       optimal design variables and gains
+     f_opt       average cost of the optimal design over the scenarios
+     g_opt       constraints of the optimal design
+     cvg_hst     best penalized cost of each generation
+    """
+
+    v_lb = np.asarray(v_lb, dtype=float)
+    v_ub = np.asarray(v_ub, dtype=float)
+    scenarios = np.random.default_rng(seed).integers(2**31 - 1, size=n_scenarios)
+
+    def penalized_cost(X):
+        # X is n_vars x n_candidates;  simulate each candidate in each scenario
+        n_cand = X.shape[1]
+        V = np.repeat(X.T, n_scenarios, axis=0)
+        seeds = np.tile(scenarios, n_cand)
+        cost, constraint = water_batch(V, constants, seeds=seeds, n_workers=n_workers)
+        cost = cost.reshape(n_cand, n_scenarios).mean(axis=1)
+        g = constraint.reshape(n_cand, n_scenarios, -1)[:, 0, :]
+        return cost + penalty * np.sum(np.maximum(g, 0)**2, axis=1)
+
+    cvg_hst = []
+
+    def progress(intermediate_result):
+        cvg_hst.append(intermediate_result.fun)
+        print(f' generation {len(cvg_hst):3d}: cost = {intermediate_result.fun:8.2f} M$  v = '
+              + ' '.join(f'{x:.4g}' for x in intermediate_result.x))
+
+    result = differential_evolution(penalized_cost, list(zip(v_lb, v_ub)), vectorized=True,
+                                    updating='deferred', maxiter=maxiter, popsize=popsize,
+                                    seed=seed, polish=False, callback=progress)
+
+    v_opt = result.x
+    cost, constraint = water_batch(np.tile(v_opt, (n_scenarios, 1)), constants,
+                                   seeds=scenarios, n_workers=n_workers)
+
+    return v_opt, np.mean(cost), constraint[0], np.array(cvg_hst)
+
+
+if __name__ == '__main__':
+
+    from water_constants import water_constants
+
+    analysis_constants = water_constants()
+    analysis_constants[-2] = 50             # 50 year simulation
+
+    #                   Vr,max  Vu,max  Vt,max  Qp,max   a_u   a_p   s_1   s_2   s_3
+    v_lb = np.array([    5000 ,  250  ,  250  ,  100  ,  1.0 , 1.0 , 0.2 , 0.2 , 0.2 ])
+    v_ub = np.array([   15000 ,  750  ,  750  ,  300  ,  4.0 , 4.0 , 5.0 , 5.0 , 5.0 ])
+
+    v_opt, f_opt, g_opt, cvg_hst = water_joint_opt(v_lb, v_ub, analysis_constants)
+    print(' optimal design and gains: ' + ' '.join(f'{x:.4g}' for x in v_opt))
+    print(f' optimal cost: {f_opt:.1f} M$')
+
+# water_joint_opt ------------------------------------------------- 2026-10-19
@@ -3,12 +3,15 @@
 # to be run after running truss_opt.m
 # CEE 201, Duke University, HP Gavin, 2019, 2022
 
+import os
 import numpy as np
 import matplotlib.pyplot as plt
 from time import time
 from datetime import datetime, timedelta
-from water_constants import water_constants
+from water_constants import water_constants, water_constants_hash
 from water_analysis import water_analysis
+from water_store import water_store_append
+from water_checkpoint import water_checkpoint_save, water_checkpoint_load
 from multivarious.rvs import lognormal
 from multivarious.rvs.plot_CDF_ci import plot_CDF_ci
 
@@ -61,11 +64,37 @@ rv = lognormal.rnd(
     R = np.eye(NR)
 )
 
+# a scenario seed for each simulation, so any simulation can be re-run
+seeds = np.random.randint(2**31 - 1, size=NS)
+
+# each simulation is saved to the store as it completes, with its yearly
+# averaged state and flow trajectories, see water_store.py
+store = 'water_montecarlo_results'
+traj  = 'year'
+
 cost84   = np.zeros(NS)  # 84th percentile cost
 cost_avg = np.zeros(NS)  # average cost
 avg_cost = 0             # average cost 
 ssq_cost = 0
 
+cost = np.zeros(NS)
+constraint = np.zeros((NS, 2))
+chash = ['']*NS
+n_done = 0               # number of completed simulations
+
+# resume an interrupted Monte Carlo analysis of this design, see water_checkpoint.py
+checkpoint = 'water_montecarlo_checkpoint.npz'
+ckpt = water_checkpoint_load(checkpoint)
+if ckpt is not None and np.array_equal(ckpt['opt_v'], opt_v) and len(ckpt['cost']) == NS:
+    rv, seeds = ckpt['rv'], ckpt['seeds']
+    cost, constraint, chash = ckpt['cost'], ckpt['constraint'], list(ckpt['chash'])
+    cost84, cost_avg = ckpt['cost84'], ckpt['cost_avg']
+    avg_cost, ssq_cost = float(ckpt['avg_cost']), float(ckpt['ssq_cost'])
+    n_done = int(ckpt['n_done'])
+    np.random.set_state(ckpt['rng_state'])
+    print(f'   resuming from {checkpoint} after {n_done} simulations')
+sim0 = n_done
+
 plt.figure(10)
 plt.clf()
 hdl_a, = plt.plot(0, 500, 'ob')
@@ -80,15 +109,16 @@ plt.legend(['sample', 'avg+std.dev', 'average'])
 start_time = time()
 
 analysis_constants[-1] = 0  # no plots
-cost = np.zeros(NS)
-for sim in range(NS):            # Monte Carlo simulation  (MCS)
+for sim in range(sim0, NS):      # Monte Carlo simulation  (MCS)
 
     analysis_constants[22] = rv[0, sim]    # CCTS
     analysis_constants[27] = rv[1, sim]    #  Tc
     analysis_constants[29] = rv[2, sim]    #  P2
     analysis_constants[13] = rv[3, sim]    #  Cc
 
-    cost[sim], _ = water_analysis(opt_v, analysis_constants)
+    chash[sim] = water_constants_hash(analysis_constants)
+    np.random.seed(seeds[sim])
+    cost[sim], constraint[sim], x, Q = water_analysis(opt_v, analysis_constants, trajectories=True)
 
     delta_cost = cost[sim] - avg_cost
     avg_cost = avg_cost + delta_cost / (sim + 1)
@@ -96,6 +126,15 @@ for sim in range(NS):            # Monte Carlo simulation  (MCS)
     if sim > 0:
         cost84[sim] = avg_cost + np.sqrt(ssq_cost / sim)
     cost_avg[sim] = avg_cost
+    n_done = sim + 1
+
+    # a simulation re-run after a resume is not stored twice
+    water_store_append(store, opt_v, seeds[sim:sim+1], chash[sim], cost[sim:sim+1], constraint[sim:sim+1],
+                       x=[x], Q=[Q], traj=traj, rv=rv[:, sim:sim+1].T)
+    water_checkpoint_save(checkpoint, opt_v=opt_v, rv=rv, seeds=seeds, cost=cost,
+                          constraint=constraint, chash=np.array(chash, dtype='U16'),
+                          cost84=cost84, cost_avg=cost_avg, avg_cost=avg_cost,
+                          ssq_cost=ssq_cost, n_done=n_done)
 
     hdl_a.set_xdata(np.arange(1, sim + 2))
     hdl_b.set_xdata(np.arange(1, sim + 2))
@@ -108,14 +147,16 @@ for sim in range(NS):            # Monte Carlo simulation  (MCS)
 
     # how much longer??
     secs = time() - start_time
-    secs_left = (NS - sim - 1) * secs / (sim + 1)
+    secs_left = (NS - sim - 1) * secs / (sim + 1 - sim0)
     eta = datetime.now() + timedelta(seconds=secs_left)
-    print(f'sim: {sim+1:3d} ({100*(sim+1)/NS:5.1f}%); {secs/(sim+1):5.2f} secs/sim; eta: {eta.strftime("%H:%M:%S")} ({secs_left:5.0f} s) cost: {cost[sim]:5.0f} {cost84[sim]:5.0f} M$')
+    print(f'sim: {sim+1:3d} ({100*(sim+1)/NS:5.1f}%); {secs/(sim+1-sim0):5.2f} secs/sim; eta: {eta.strftime("%H:%M:%S")} ({secs_left:5.0f} s) cost: {cost[sim]:5.0f} {cost84[sim]:5.0f} M$')
 
     if not (cost[sim] > 0):
         print('uh oh - non-positive cost!')
         break
 
+os.remove(checkpoint)
+
 # emperical cumulative distribution function ...
 
 eCDF = (np.arange(1, NS + 1) - 0.5) / NS
@@ -0,0 +1,292 @@
+# water_network.py
+# a water supply system as a network of nodes and edges
+#
+# nodes store water:  'ground' water of a watershed, 'reservoir',
+# 'untreated' water tank, and 'treated' water tank.
+# edges carry water from one node to another:
+#   'stream'    ground    -> reservoir   stream flow Qs, carrying contaminants Cs
+#   'baseflow'  ground    -> reservoir   ground water flow Qg
+# the stream and ground water flows of a watershed with several stream or
+# baseflow edges are divided equally among them.
+#   'intake'    reservoir -> untreated   controlled flow Qu
+#   'plant'     untreated -> treated     controlled treatment flow Qp
+# water leaving the network (transpiration, evaporation, river releases,
+# overflows, and demand) is a loss from its node.  All releases and overflows
+# flow into one river downstream.
+#
+# the water and contaminant mass balances are assembled with sparse
+# node-edge incidence matrices, and the flow laws are evaluated for all
+# nodes and edges of each kind at once, so the cost of the state derivative
+# grows with the number of nodes and edges.  The flow laws, controls, and
+# costs are those of water_system.py;  water_network_preset builds the
+# system of water_system.py, with one node of each kind.
+
+import numpy as np
+from scipy import sparse
+from my_water_control import my_water_control
+from water_analysis import water_forcing
+from multivarious.utils import ode4u
+
+
+def water_network(nodes, edges, constants):
+    """
+    net = water_network( nodes , edges , constants )
+    assemble a water supply network
+
+     INPUTS     DESCRIPTION
+     nodes      list of ( name , kind , capacity , share ) for each node,
+                kind is 'ground', 'reservoir', 'untreated', or 'treated'
+                capacity is the volume capacity, Mgal
+                share is the fraction of the precipitation on a 'ground' node,
+                or the fraction of the water demand from a 'treated' node
+     edges      list of ( src , dst , kind ) for each edge between named nodes,
+                or ( src , dst , 'plant' , Qp_max ) for each treatment plant
+                each untreated tank is fed by one intake and feeds one plant
+     constants  a set of many constants involved in this system
+
+     OUTPUTS    DESCRIPTION
+     net        dictionary of the network, its incidence matrices, and its
+                initial state x0 = [ volumes (N) ; masses (N x 3) ; cost ]
+    """
+
+    names = [node[0] for node in nodes]
+    kind = np.array([node[1] for node in nodes])
+    N = len(nodes)
+    E = len(edges)
+
+    net = {'names': names, 'constants': constants, 'N': N, 'E': E}
+    net['capacity'] = np.array([node[2] for node in nodes], dtype=float)
+    net['share'] = np.array([node[3] for node in nodes], dtype=float)
+    for k in ['ground', 'reservoir', 'untreated', 'treated']:
+        net[k] = np.where(kind == k)[0]
+
+    # position of each node among the nodes of its kind
+    net['pos'] = np.zeros(N, dtype=int)
+    for k in ['ground', 'reservoir', 'untreated', 'treated']:
+        net['pos'][net[k]] = np.arange(len(net[k]))
+
+    src = np.array([names.index(e[0]) for e in edges], dtype=int)
+    dst = np.array([names.index(e[1]) for e in edges], dtype=int)
+    edge_kind = np.array([e[2] for e in edges])
+    net['src'], net['dst'] = src, dst
+    for k in ['stream', 'baseflow', 'intake', 'plant']:
+        net[k + '_edges'] = np.where(edge_kind == k)[0]
+
+    # sparse incidence matrices: edges out of and into each node
+    net['B_out'] = sparse.csr_matrix((np.ones(E), (src, np.arange(E))), shape=(N, E))
+    net['B_in']  = sparse.csr_matrix((np.ones(E), (dst, np.arange(E))), shape=(N, E))
+    net['B'] = net['B_in'] - net['B_out']
+
+    # each plant, its intake, and its reservoir
+    plants = net['plant_edges']
+    intakes = net['intake_edges']
+    net['Qp_max'] = np.array([edges[e][3] for e in plants], dtype=float)
+    net['plant_intake'] = np.array([intakes[dst[intakes] == src[e]][0] for e in plants], dtype=int)
+    net['plant_reservoir'] = src[net['plant_intake']]
+    # each intake's share of the water available in its reservoir
+    n_intakes = np.bincount(src[intakes], minlength=N)
+    net['intake_share'] = 1.0 / n_intakes[net['plant_reservoir']]
+    # each stream and baseflow edge's share of the stream and ground water
+    # flows of its watershed
+    for k in ['stream', 'baseflow']:
+        n_edges = np.bincount(src[net[k + '_edges']], minlength=N)
+        net[k + '_share'] = 1.0 / n_edges[src[net[k + '_edges']]]
+    # the reservoir supplying each treated tank, for water conservation
+    treated_plant = np.array([np.where(dst[plants] == n)[0][0] for n in net['treated']], dtype=int)
+    net['treated_reservoir'] = net['plant_reservoir'][treated_plant]
+
+    # initial volumes, contaminant masses, and cost, as in water_simulate
+    Cr = constants[30]
+    Cu = constants[31]
+    Ct = constants[32]
+    cap = net['capacity']
+
+    V0 = np.zeros(N)
+    m0 = np.zeros((N, 3))
+    V0[net['ground']]    = 0.9 * cap[net['ground']]
+    V0[net['reservoir']] = 0.8 * cap[net['reservoir']]
+    V0[net['untreated']] = 0.5 * cap[net['untreated']]
+    V0[net['treated']]   = 0.5 * cap[net['treated']]
+    m0[net['reservoir']] = V0[net['reservoir'], None] * Cr
+    m0[net['untreated']] = V0[net['untreated'], None] * Cu
+    m0[net['treated']]   = V0[net['treated'], None] * Ct
+    Z0 = (1 + 0.01 * np.sum(cap[net['reservoir']]) + 0.5 * np.sum(cap[net['untreated']])
+          + 0.5 * np.sum(cap[net['treated']]) + 0.1 * np.sum(net['Qp_max']))
+    net['x0'] = np.concatenate([V0, m0.ravel(), [Z0]])
+
+    return net
+
+
+def water_network_preset(v, constants):
+    """
+    net = water_network_preset( v , constants )
+    the water supply system of water_system.py as a network, for the
+    design variables v = [ Vr_max , Vu_max , Vt_max , Qp_max ]
+    """
+
+    Vg_max = constants[14]
+
+    nodes = [('ground',    'ground',    Vg_max, 1.0),
+             ('reservoir', 'reservoir', v[0],   0.0),
+             ('untreated', 'untreated', v[1],   0.0),
+             ('treated',   'treated',   v[2],   1.0)]
+    edges = [('ground',    'reservoir', 'stream'),
+             ('ground',    'reservoir', 'baseflow'),
+             ('reservoir', 'untreated', 'intake'),
+             ('untreated', 'treated',   'plant', v[3])]
+
+    return water_network(nodes, edges, constants)
+
+
+def water_network_system(t, x, w, net):
+    """
+    dxdt, Q = water_network_system( t , x , w , net )
+    the state derivative of a water supply network, with the flow laws,
+    controls, and costs of water_system.py
+
+     INPUTS     DESCRIPTION
+     t          time, days
+     x          state [ volumes (N) ; contaminant masses (N x 3) ; cost ]
+     w          environmental conditions [ population ; temperature ;
+                                           precipitation ; water demand ]
+     net        the network, from water_network
+
+     OUTPUTS    DESCRIPTION
+     dxdt       state derivative
+     Q          flow of each edge, and the river flow,  Mgal/day
+    """
+
+    c = net['constants']
+    alpha_t, beta_t, alpha_s, alpha_g, alpha_e, beta_e = c[0:6]
+    Cs_base  = c[9]
+    cp       = c[10]
+    cs       = c[11]
+    Cc       = c[13]
+    Qr_min   = c[15]
+    R        = c[16]
+    Ct_allow = c[17]
+    Pc, Pv, Pf = c[18], c[19], c[20]
+    operating_cost = c[21]
+
+    N = net['N']
+    cap = net['capacity']
+    pos = net['pos']
+    src = net['src']
+    g, r, u, tk = net['ground'], net['reservoir'], net['untreated'], net['treated']
+
+    V = x[:N]
+    m = x[N:4*N].reshape(N, 3)
+    C = m / V[:, None]                  # concentrations in each node
+
+    P   = w[0]       # population
+    T   = w[1]       # temperature                           deg F
+    Qi  = w[2]       # input precipitation                   Mgal/day
+    Qd  = w[3]       # daily water demand                    Mgal/day
+
+    # ground water flows ...
+    Qt = (alpha_t + beta_t*T) * V[g] / cap[g]             # transpiration
+    Qs = alpha_s * V[g] / cap[g] + np.maximum(V[g] - cap[g], 0) / 4   # stream flow and overflow
+    Qg = alpha_g * V[g] / cap[g]                          # ground water flow
+    Cs = Cs_base + cp*P + cs*Qs[:, None]                  # streamflow contaminant concentrations
+    Cs[Cs < 1e-3] = 1e-2
+
+    # reservoir flows ...
+    Qe = (alpha_e + beta_e*T) * V[r] / cap[r]             # evaporation
+    Qr = np.where(V[r] < 0.05*cap[r], 1.0,                # can NOT drain reservoir
+         np.where(V[r] > 0.80*cap[r], Qr_min + (V[r] - 0.8*cap[r])/3, Qr_min))
+    Qro = np.maximum(V[r] - cap[r], 0) / 9                # reservoir overflow
+    Quo = np.maximum(V[u] - cap[u], 0)                    # untreated overflow
+    Qto = np.maximum(V[tk] - cap[tk], 0)                  # treated overflow
+
+    # control of each treatment plant ...
+    plants = net['plant_edges']
+    un = src[plants]
+    tn = net['dst'][plants]
+    rn = net['plant_reservoir']
+    Qp_max = net['Qp_max']
+    Qu = np.zeros(len(plants))
+    Qp = np.zeros(len(plants))
+    q  = np.zeros((len(plants), 3))
+    for j in range(len(plants)):
+        msmnts = np.array([V[rn[j]], V[un[j]], V[tn[j]], *C[un[j]], *C[tn[j]]])
+        controls = my_water_control(msmnts, [cap[rn[j]], cap[un[j]], cap[tn[j]], Qp_max[j]])
+        Qu[j], Qp[j], q[j] = controls[0], controls[1], controls[2:5]
+
+    Qp = np.maximum(np.minimum(Qp, Qp_max), 0.1)          # limit flow through the treatment processes
+    q  = np.maximum(q, 1e-3)                              # limit min decon through the treatment processes
+    Qp = np.where(V[un] < 0.20*cap[un], 0.01*Qp_max, Qp)  # should NOT drain untreated tank
+    Qp = np.where(V[un] < 0.05*cap[un], 0.0, Qp)          # can    NOT drain untreated tank
+    Qu = np.where(V[rn] < 0.05*cap[rn], 0.0, Qu)          # can    NOT drain reservoir
+    Qu = np.minimum(Qu, 0.9*(V[rn] - Qe[pos[rn]] - Qr[pos[rn]]) * net['intake_share'])
+
+    Cp = C[un] * np.exp(-(q @ R.T) / (Qp[:, None] + np.finfo(float).eps))  # post-treatment concentrations
+
+    # water demand from each treated tank ...
+    Qd = net['share'][tk] * Qd
+    Qd = np.where(V[tk] < 0.05*cap[tk], 0.0, Qd)          # can    NOT drain   treated tank
+    tr = net['treated_reservoir']
+    Qd = np.where(V[tr] / cap[tr] < 0.5, Qd*(1.0 - Cc), Qd)  # enforce water conservation
+
+    # flows and contaminant mass flows of the edges ...
+    E = net['E']
+    qe = np.zeros(E)
+    f_out = np.zeros((E, 3))
+    se, be, ie = net['stream_edges'], net['baseflow_edges'], net['intake_edges']
+    qe[se] = Qs[pos[src[se]]] * net['stream_share']
+    f_out[se] = Cs[pos[src[se]]] * qe[se, None]
+    qe[be] = Qg[pos[src[be]]] * net['baseflow_share']
+    qe[net['plant_intake']] = Qu
+    f_out[ie] = C[src[ie]] * qe[ie, None]
+    qe[plants] = Qp
+    f_out[plants] = C[un] * Qp[:, None]
+    f_in = f_out.copy()
+    f_in[plants] = Cp * Qp[:, None]                       # treatment removes contaminants
+
+    # mass conservation ...
+    dV = net['B'] @ qe
+    dV[g]  += net['share'][g] * Qi - Qt
+    dV[r]  -= Qe + Qr + Qro
+    dV[u]  -= Quo
+    dV[tk] -= Qd + Qto
+
+    dm = net['B_in'] @ f_in - net['B_out'] @ f_out
+    dm[g]  = 0.0                                          # ground water contaminants are not tracked
+    dm[r]  -= C[r] * (Qr + Qro)[:, None]
+    dm[u]  -= C[u] * Quo[:, None]
+    dm[tk] -= C[tk] * (Qd + Qto)[:, None]
+
+    Qriver = np.sum(Qr + Qro) + np.sum(Quo) + np.sum(Qto)  # overflows go to the river
+
+    # the rate of cost increase of operating the water treatment system
+    dZ_dt = np.sum(operating_cost * q)                    # daily operating costs
+    dZ_dt += Pc * np.sum(Qd[np.any(C[tk] > Ct_allow, axis=1)])  # contamination penalty
+    dZ_dt += Pv * np.sum(Qd[V[tk] < 0.11*cap[tk]])        # supply penalty
+    if Qriver > 5e3:                                      # river floods
+        dZ_dt += Pf
+
+    dxdt = np.concatenate([dV, dm.ravel(), [dZ_dt]])
+    Q = np.append(qe, Qriver)
+
+    return dxdt, Q
+
+
+def water_network_simulate(net, tilt=None):
+    """
+    t, x, Q, w, cost = water_network_simulate( net , tilt )
+    simulate a water supply network over the analysis duration, with the
+    environmental time series of water_forcing
+
+     OUTPUTS    DESCRIPTION
+     t          the days of operation
+     x          the states [ volumes (N) ; masses (N x 3) ; cost ] for each day
+     Q          the flows of the edges and the river flow for each day
+     w          environmental time series, see water_forcing
+     cost       cost of operating the water supply network
+    """
+
+    t, w, RainFall, log_lr, _ = water_forcing(net['constants'], tilt)
+    t, x, dxdt, Q = ode4u(water_network_system, t, net['x0'], u=w, c=net)
+
+    return t, x, Q, w, x[-1, -1]
+
+# water_network --------------------------------------------------- 2026-10-19
@@ -56,6 +56,9 @@ design_vars_opt, f_opt, g_opt, cvg_hst = nms(water_analysis, design_vars_init, d
 
 plot_cvg_hst(cvg_hst, design_vars_opt, 20)
 
+# save the convergence history for later analysis
+np.savez('water_opt_results.npz', design_vars_opt=design_vars_opt, f_opt=f_opt, g_opt=g_opt, cvg_hst=cvg_hst)
+
 # assess the one example of the optimized design  ---------------------------
 # ... consider assessing the optimized design a few times
 analysis_constants[-1] = 1  # plots on
@@ -0,0 +1,81 @@
+# water_precision.py
+# accuracy of reduced precision (float32) simulations of the water supply
+# system with respect to the float64 baseline, for screening ensembles
+
+import numpy as np
+from water_analysis import water_simulate
+
+
+def water_precision(v, constants, seeds, dtype=np.float32):
+    """
+    report = water_precision( v , constants , seeds , dtype )
+    simulate the design with each random number seed with the default float64
+    simulation of water_simulate (dtype = None) and in the reduced precision 
+    dtype, and compare the results.
+
+     INPUTS     DESCRIPTION
+     v          design variables [ Vr_max , Vu_max , Vt_max , Qp_max ]
+     constants  a set of many constants involved in this system
+     seeds      random number seeds, one simulation pair per seed
+     dtype      reduced precision of the simulations           default np.float32
+
+     OUTPUTS    DESCRIPTION
+     report     dictionary of, for each seed,
+       'cost_err'    relative error of the cost
+       'volume_err'  largest error of the volumes Vg, Vr, Vu, Vt / capacities
+       'mass_err'    largest error of the pollutant masses / largest mass
+       'empty_days'  change in the number of days Vt < 0.11*Vt_max
+       'flood_days'  change in the number of days Qr > 5e3
+     and the bytes of the x, Q, and w time series per simulation,
+       'bytes_64' and 'bytes_32'
+    """
+
+    constants = list(constants)
+    constants[-1] = 0           # no plots
+
+    Vg_max = constants[14]
+    capacity = np.array([Vg_max, v[0], v[1], v[2]])
+
+    NS = len(seeds)
+    report = {key: np.zeros(NS) for key in ['cost_err', 'volume_err', 'mass_err', 'empty_days', 'flood_days']}
+
+    for sim in range(NS):
+        np.random.seed(seeds[sim])
+        t, x64, Q64, w64, _, _, cost64 = water_simulate(v, constants)
+        np.random.seed(seeds[sim])
+        t, x32, Q32, w32, _, _, cost32 = water_simulate(v, constants, dtype=dtype)
+
+        x32 = x32.astype(float)
+        report['cost_err'][sim]   = abs(cost32 - cost64) / abs(cost64)
+        report['volume_err'][sim] = np.max(np.abs(x32[0:4, :] - x64[0:4, :]) / capacity[:, None])
+        report['mass_err'][sim]   = np.max(np.abs(x32[4:13, :] - x64[4:13, :])) / np.max(np.abs(x64[4:13, :]))
+        report['empty_days'][sim] = np.sum(x32[3, :] < 0.11 * v[2]) - np.sum(x64[3, :] < 0.11 * v[2])
+        report['flood_days'][sim] = np.sum(Q32[4, :] > 5e3) - np.sum(Q64[4, :] > 5e3)
+
+    report['bytes_64'] = x64.nbytes + Q64.nbytes + w64.nbytes
+    report['bytes_32'] = x32.size * np.dtype(dtype).itemsize + Q32.nbytes + w32.nbytes
+
+    print(f' {np.dtype(dtype).name} vs float64 over {NS} simulations           max       mean')
+    print(f'   relative cost error                         {np.max(report["cost_err"]):9.2e}  {np.mean(report["cost_err"]):9.2e}')
+    print(f'   volume error / capacity                     {np.max(report["volume_err"]):9.2e}  {np.mean(report["volume_err"]):9.2e}')
+    print(f'   pollutant mass error / max mass             {np.max(report["mass_err"]):9.2e}  {np.mean(report["mass_err"]):9.2e}')
+    print(f'   change in days out of water                 {np.max(np.abs(report["empty_days"])):9.0f}  {np.mean(report["empty_days"]):9.2f}')
+    print(f'   change in days of flooding                  {np.max(np.abs(report["flood_days"])):9.0f}  {np.mean(report["flood_days"]):9.2f}')
+    print(f'   time series memory per simulation, MB       {report["bytes_64"]/1e6:9.2f} -> {report["bytes_32"]/1e6:.2f}')
+
+    return report
+
+
+if __name__ == '__main__':
+
+    from water_constants import water_constants
+
+    #              Vr,max Vu,max Vt,max Qp,max
+    v = np.array([ 10000 ,  500 ,  500 ,  200 ])
+
+    analysis_constants = water_constants()
+    analysis_constants[-2] = 50             # 50 year simulation
+
+    water_precision(v, analysis_constants, seeds=np.arange(10))
+
+# water_precision ------------------------------------------------- 2026-10-19
@@ -0,0 +1,263 @@
+# water_queue.py
+# a task queue of water supply system simulations, for sweeps and Monte
+# Carlo analyses run by many worker processes on one or more computers
+#
+# a task is a ( design , scenario seed , constants hash ) triple.  The
+# coordinator submits tasks, workers claim batches of tasks, simulate them,
+# and write their results.  A claimed task is leased to its worker; if the
+# worker does not complete the task before its lease expires, the task is
+# returned to the queue and retried by another worker, up to max_attempts.
+# Results are written idempotently:  the first result of a task is kept.
+#
+# SQLiteQueue keeps the queue in an SQLite database file.  It suits the
+# workers of one computer, or of computers sharing a file system with
+# reliable POSIX locks.  On a local file system the database uses a
+# write-ahead log;  SQLite's write-ahead log needs shared memory that network
+# file systems do not provide, so on a network file system (NFS, SMB, ...)
+# the database uses the rollback journal.  Another backend, e.g. for a
+# message broker, needs only the methods  submit, claim, complete, fail,
+# counts, and results.
+#
+# usage:   python water_queue.py worker queue.db [number of local workers]
+
+import os
+import sys
+import time
+import pickle
+import socket
+import hashlib
+import sqlite3
+import numpy as np
+from multiprocessing import Process
+from water_constants import water_constants_hash
+from water_batch import water_evaluate
+
+
+class SQLiteQueue:
+    """
+    queue = SQLiteQueue( path , max_attempts , journal_mode )
+    a task queue of water supply system simulations in the SQLite database path.
+    journal_mode is 'WAL' or 'DELETE', or None for 'DELETE' if path is on a
+    network file system and 'WAL' otherwise.
+    """
+
+    def __init__(self, path, max_attempts=3, journal_mode=None):
+        self.path = path
+        self.max_attempts = max_attempts
+        if journal_mode is None:
+            journal_mode = 'DELETE' if _network_file_system(path) else 'WAL'
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.db.execute(f'PRAGMA journal_mode={journal_mode}')
+        self.db.execute('CREATE TABLE IF NOT EXISTS constants (chash TEXT PRIMARY KEY, value BLOB)')
+        self.db.execute('CREATE TABLE IF NOT EXISTS tasks (id TEXT PRIMARY KEY, v BLOB, seed INTEGER, '
+                        'chash TEXT, state TEXT, worker TEXT, lease REAL, attempts INTEGER, '
+                        'cost REAL, g BLOB, error TEXT)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS tasks_state ON tasks (state)')
+
+    def submit(self, V, constants, seeds):
+        """
+        ids = queue.submit( V , constants , seeds )
+        submit a task for each design (row of V), each with a set of
+        constants (or one set for all) and a scenario seed.
+        Re-submitting a task does not duplicate it.
+        """
+
+        V = np.atleast_2d(np.asarray(V, dtype=float))
+        if not isinstance(constants[0], list):
+            constants = [constants] * V.shape[0]
+
+        ids = []
+        self.db.execute('BEGIN IMMEDIATE')
+        for v, c, seed in zip(V, constants, seeds):
+            chash = water_constants_hash(c)
+            self.db.execute('INSERT OR IGNORE INTO constants VALUES (?, ?)', (chash, pickle.dumps(c)))
+            task_id = hashlib.sha1(v.tobytes() + str(int(seed)).encode() + chash.encode()).hexdigest()
+            self.db.execute('INSERT OR IGNORE INTO tasks (id, v, seed, chash, state, attempts) '
+                            'VALUES (?, ?, ?, ?, ?, 0)', (task_id, v.tobytes(), int(seed), chash, 'pending'))
+            ids.append(task_id)
+        self.db.execute('COMMIT')
+
+        return ids
+
+    def claim(self, worker, n=1, lease=3600):
+        """
+        tasks = queue.claim( worker , n , lease )
+        claim up to n pending tasks for lease seconds,
+        as a list of ( task_id , v , constants , seed )
+        """
+
+        now = time.time()
+        self.db.execute('BEGIN IMMEDIATE')
+        # tasks with expired leases are retried, or fail after max_attempts
+        self.db.execute("UPDATE tasks SET state = 'failed', error = 'lease expired' "
+                        "WHERE state = 'running' AND lease < ? AND attempts >= ?", (now, self.max_attempts))
+        self.db.execute("UPDATE tasks SET state = 'pending' "
+                        "WHERE state = 'running' AND lease < ?", (now,))
+        rows = self.db.execute("SELECT id, v, seed, chash FROM tasks WHERE state = 'pending' LIMIT ?",
+                               (n,)).fetchall()
+        self.db.executemany("UPDATE tasks SET state = 'running', worker = ?, lease = ?, "
+                            "attempts = attempts + 1 WHERE id = ?",
+                            [(worker, now + lease, row[0]) for row in rows])
+        self.db.execute('COMMIT')
+
+        tasks = []
+        for task_id, v, seed, chash in rows:
+            c = self.db.execute('SELECT value FROM constants WHERE chash = ?', (chash,)).fetchone()[0]
+            tasks.append((task_id, np.frombuffer(v), pickle.loads(c), seed))
+
+        return tasks
+
+    def complete(self, task_id, cost, constraint):
+        """
+        queue.complete( task_id , cost , constraint )
+        write the result of a task, unless it already has one
+        """
+
+        self.db.execute("UPDATE tasks SET state = 'done', cost = ?, g = ?, error = NULL "
+                        "WHERE id = ? AND state != 'done'",
+                        (float(cost), np.asarray(constraint, dtype=float).tobytes(), task_id))
+
+    def fail(self, task_id, worker, error):
+        """
+        queue.fail( task_id , worker , error )
+        return a task that raised an error in worker to the queue, or fail it
+        after max_attempts, unless the task has since been claimed by another worker
+        """
+
+        self.db.execute("UPDATE tasks SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                        "error = ? WHERE id = ? AND state = 'running' AND worker = ?",
+                        (self.max_attempts, str(error), task_id, worker))
+
+    def counts(self):
+        """
+        counts = queue.counts()
+        the number of tasks in each state:  pending, running, done, failed
+        """
+
+        counts = dict.fromkeys(['pending', 'running', 'done', 'failed'], 0)
+        counts.update(self.db.execute('SELECT state, COUNT(*) FROM tasks GROUP BY state').fetchall())
+
+        return counts
+
+    def results(self):
+        """
+        V, seeds, chash, cost, constraint = queue.results()
+        the results of all completed tasks
+        """
+
+        rows = self.db.execute("SELECT v, seed, chash, cost, g FROM tasks WHERE state = 'done' "
+                               "ORDER BY rowid").fetchall()
+        V = np.array([np.frombuffer(row[0]) for row in rows]).reshape(len(rows), -1)
+        seeds = np.array([row[1] for row in rows], dtype=np.int64)
+        chash = [row[2] for row in rows]
+        cost = np.array([row[3] for row in rows])
+        constraint = np.array([np.frombuffer(row[4]) for row in rows]).reshape(len(rows), -1)
+
+        return V, seeds, chash, cost, constraint
+
+
+def _network_file_system(path):
+    """
+    True if path is on a network file system, from the mount table (Linux)
+    """
+
+    network_types = ('nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'ncpfs', 'afs', '9p',
+                     'fuse.sshfs', 'lustre', 'gpfs', 'beegfs', 'ceph', 'glusterfs')
+    path = os.path.realpath(os.path.dirname(os.path.abspath(path)))
+    mount, fs_type = '', ''
+    try:
+        with open('/proc/mounts') as f:
+            for line in f:
+                fields = line.split()
+                point = fields[1].replace('\\040', ' ')
+                if (path == point or path.startswith(point.rstrip('/') + '/')) and len(point) >= len(mount):
+                    mount, fs_type = point, fields[2]
+    except OSError:
+        return False
+
+    return fs_type in network_types
+
+
+def water_queue_worker(queue, batch=4, lease=3600, poll=5, dtype=None):
+    """
+    n_done = water_queue_worker( queue , batch , lease , poll , dtype )
+    claim batches of tasks from the queue, simulate them, and write their
+    results, until no task is pending or running
+
+     INPUTS     DESCRIPTION
+     queue      a task queue, e.g. SQLiteQueue, or the path of an SQLite queue
+     batch      number of tasks claimed at once
+     lease      seconds to complete a batch before its tasks are retried
+     poll       seconds to wait for running tasks of other workers
+     dtype      reduced precision of the simulations, see water_simulate
+
+     OUTPUTS    DESCRIPTION
+     n_done     number of tasks completed by this worker
+    """
+
+    if isinstance(queue, str):
+        queue = SQLiteQueue(queue)
+    worker = f'{socket.gethostname()}:{os.getpid()}'
+
+    n_done = 0
+    while True:
+        tasks = queue.claim(worker, batch, lease)
+        if not tasks:
+            counts = queue.counts()
+            if counts['pending'] + counts['running'] == 0:
+                return n_done
+            time.sleep(poll)
+            continue
+        for task_id, v, constants, seed in tasks:
+            try:
+                cost, constraint = water_evaluate((v, constants, seed, dtype))
+            except Exception as err:
+                queue.fail(task_id, worker, repr(err))
+                continue
+            queue.complete(task_id, cost, constraint)
+            n_done += 1
+
+
+def water_queue_workers(path, n_workers, **options):
+    """
+    water_queue_workers( path , n_workers , **options )
+    run n_workers local worker processes on the SQLite queue path until the
+    queue is finished.  options are passed to water_queue_worker.
+    """
+
+    workers = [Process(target=water_queue_worker, args=(path,), kwargs=options) for _ in range(n_workers)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+
+def water_queue_wait(queue, poll=10):
+    """
+    counts = water_queue_wait( queue , poll )
+    report the progress of the queue every poll seconds until no task is
+    pending or running
+    """
+
+    if isinstance(queue, str):
+        queue = SQLiteQueue(queue)
+
+    while True:
+        counts = queue.counts()
+        print(f' pending: {counts["pending"]:6d}  running: {counts["running"]:6d}'
+              f'  done: {counts["done"]:6d}  failed: {counts["failed"]:6d}')
+        if counts['pending'] + counts['running'] == 0:
+            return counts
+        time.sleep(poll)
+
+
+if __name__ == '__main__':
+
+    if len(sys.argv) < 3 or sys.argv[1] != 'worker':
+        print('usage:   python water_queue.py worker queue.db [number of local workers]')
+        sys.exit(1)
+
+    n_workers = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    water_queue_workers(sys.argv[2], n_workers)
+
+# water_queue ----------------------------------------------------- 2026-10-19
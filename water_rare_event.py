@@ -0,0 +1,213 @@
+# water_rare_event.py
+# probabilities of rare events in the water supply system over the analysis
+# duration ... any day of downstream flooding, or any day the treated water
+# tank is nearly empty ... by subset simulation.
+#
+# Each simulation is driven by standard normal variables, 5 per day, from
+# which water_forcing finds the rainfall, the rainfall area, the population
+# and the water demand (see water_forcing).  Subset simulation writes the
+# small probability of the event as a product of larger conditional
+# probabilities of a sequence of intermediate levels of the event
+# performance g, and samples each level by Markov chains started from the
+# samples of the previous level that reach it.  Unlike importance sampling,
+# nothing is weighted by a likelihood ratio over the days of the analysis,
+# so the estimate does not degrade with the duration of the analysis.
+#
+# S.K. Au and J.L. Beck, Estimation of small failure probabilities in high
+# dimensions by subset simulation, Probabilistic Engineering Mechanics,
+# 16(4):263-277, 2001.
+
+import numpy as np
+from scipy.stats import norm
+from water_analysis import water_forcing, water_simulate
+
+
+def water_event(v, x, Q, event, threshold=None):
+    """
+    g = water_event( v , x , Q , event , threshold )
+    performance of one simulation with respect to a rare event.
+    The event occurs in the simulation if g >= 0.
+
+     event     DESCRIPTION                                g
+     'flood'   river flow Qr exceeds threshold            max(Qr) / threshold - 1
+               (default 5e3 Mgal/day)
+     'empty'   treated volume below threshold*Vt_max      1 - min(Vt) / (threshold*Vt_max)
+               (default 0.11)
+    """
+
+    if event == 'flood':
+        return np.max(Q[4, :]) / (threshold or 5e3) - 1
+    if event == 'empty':
+        return 1 - np.min(x[3, :]) / ((threshold or 0.11) * v[2])
+    raise ValueError(f"water_event: event must be 'flood' or 'empty', not '{event}'")
+
+
+def water_rare_event(v, constants, event, N=100, p0=0.1, max_levels=10, ci=95, seed=None, threshold=None):
+    """
+    P, P_ci, n_sims = water_rare_event( v , constants , event , N , p0 , max_levels , ci , seed , threshold )
+    estimate the probability of a rare event over the analysis duration
+    by subset simulation.
+    N simulations of the first level are sampled from the nominal model.
+    The intermediate level of the event performance g is the value
+    exceeded by the 100*p0 percent highest samples, which start the
+    Markov chains of the next N simulations, conditioned on reaching
+    that level.  The levels end when the intermediate level reaches the
+    event, g >= 0, or after max_levels levels.
+
+     INPUTS      DESCRIPTION
+     v           design variables [ Vr_max , Vu_max , Vt_max , Qp_max ]
+     constants   a set of many constants involved in this system
+     event       'flood' or 'empty', see water_event
+     N           number of simulations per level                   default 100
+     p0          conditional probability of the intermediate levels default 0.1
+     max_levels  maximum number of levels                          default 10
+     ci          confidence level of the probability bounds, %     default 95
+     seed        random number generator seed, None for no seeding
+     threshold   threshold of the event, see water_event
+
+     OUTPUTS     DESCRIPTION
+     P           estimated probability of the event,
+                 NaN (no estimate) if no sample reaches the event
+     P_ci        confidence bounds [ lower , upper ] on P, NaN if no estimate
+     n_sims      total number of simulations
+    """
+
+    constants = list(constants)
+    constants[-1] = 0           # no plots
+    days = 365 * constants[-2]
+
+    if seed is not None:
+        np.random.seed(seed)
+
+    n_seeds = int(round(p0 * N))        # number of Markov chains per level
+    n_steps = N // n_seeds              # number of states of each chain
+    N = n_seeds * n_steps
+
+    def performance(u):
+        t, w, RainFall, log_lr, _ = water_forcing(constants, u=u)
+        _, x, Q, _, _, _, _ = water_simulate(v, constants, forcing=(t, w, RainFall, log_lr))
+        return water_event(v, x, Q, event, threshold)
+
+    # level 0:  independent samples of the nominal model, one chain per sample
+    U = np.random.randn(N, 1, 5, days)
+    g = np.array([[performance(U[i, 0])] for i in range(N)])
+    n_sims = N
+
+    P = 1.0
+    cov2 = 0.0                  # squared coefficient of variation of P
+    sigma = 0.6                 # standard deviation of the proposals
+    for level in range(max_levels):
+        b = _next_level(g, n_seeds)
+        if b >= 0:
+            break
+        P *= p0
+        cov2 += (1 - p0) / (p0 * N) * (1 + _chain_correlation(g >= b))
+
+        seeds = np.argsort(g.ravel())[::-1][:n_seeds]
+        U, g, sigma, accept = _conditional_sample(performance, U.reshape(N, 5, days)[seeds], g.ravel()[seeds],
+                                                  b, n_steps, sigma)
+        n_sims += n_seeds * (n_steps - 1)
+        print(f' level {level+1:2d}: g = {b:8.4f}  P = {P:.3e}  acceptance = {accept:.2f}')
+
+    hits = g >= 0
+    if not np.any(hits):
+        # no sample reached the event, so there is nothing to estimate the
+        # probability of the last level from:  no estimate
+        print(f' P[{event}]:  no estimate, no sample reached the event  {n_sims} sims')
+        return np.nan, np.array([np.nan, np.nan]), n_sims
+
+    P_last = np.mean(hits)
+    P *= P_last
+    cov2 += (1 - P_last) / (P_last * N) * (1 + _chain_correlation(hits))
+
+    # lognormal confidence bounds for the product of the level probabilities
+    z = norm.ppf(0.5 + ci / 200)
+    s = np.sqrt(np.log(1 + cov2))
+    P_ci = P * np.exp(np.array([-z * s, z * s]))
+
+    print(f' P[{event}] = {P:.3e}  ({ci}% c.i.: {P_ci[0]:.3e} .. {P_ci[1]:.3e})  {n_sims} sims,'
+          f'  c.o.v. {np.sqrt(cov2):.2f}')
+    if cov2 > 0:
+        # plain Monte Carlo simulations for the same coefficient of variation
+        print(f' ... plain Monte Carlo would need about {(1 - P) / P / cov2:.0f} sims')
+
+    return P, P_ci, n_sims
+
+
+def _conditional_sample(performance, U0, g0, b, n_steps, sigma):
+    """
+    Markov chains of n_steps states started from each sample U0 of the
+    standard normal variables, conditioned on g >= b.  The candidate
+    state  rho*u + sqrt(1-rho^2)*z  leaves the standard normal density
+    unchanged, and is accepted if it reaches the level b.  The standard
+    deviation sigma of the proposals is adapted, chain by chain, towards
+    an acceptance rate of 0.44.
+    """
+
+    n_seeds, n_u, days = U0.shape
+    U = np.zeros((n_seeds, n_steps, n_u, days))
+    g = np.zeros((n_seeds, n_steps))
+    U[:, 0], g[:, 0] = U0, g0
+
+    n_accept = 0
+    for j in range(n_seeds):
+        rho = np.sqrt(1 - sigma**2)
+        accepted = 0
+        for k in range(1, n_steps):
+            cand = rho * U[j, k-1] + sigma * np.random.randn(n_u, days)
+            g_cand = performance(cand)
+            if g_cand >= b:
+                U[j, k], g[j, k] = cand, g_cand
+                accepted += 1
+            else:
+                U[j, k], g[j, k] = U[j, k-1], g[j, k-1]
+        n_accept += accepted
+        a = accepted / (n_steps - 1)
+        sigma = min(max(sigma * np.exp((a - 0.44) / np.sqrt(j + 1)), 0.05), 1.0)
+
+    return U, g, sigma, n_accept / (n_seeds * (n_steps - 1))
+
+
+def _next_level(g, n_seeds):
+    """
+    the value of g between the n_seeds highest samples and the others
+    """
+
+    g_sorted = np.sort(g.ravel())[::-1]
+    return 0.5 * (g_sorted[n_seeds - 1] + g_sorted[n_seeds])
+
+
+def _chain_correlation(I):
+    """
+    the factor gamma of the correlation of the indicators I ( chains x steps )
+    of the states of the Markov chains of one level, Au and Beck (2001) eq. 29
+    """
+
+    n_seeds, n_steps = I.shape
+    N = I.size
+    I = I.astype(float)
+    P = np.mean(I)
+    R0 = P * (1 - P)
+    if R0 == 0:
+        return 0.0
+    gamma = 0.0
+    for k in range(1, n_steps):
+        R = np.sum(I[:, :n_steps-k] * I[:, k:]) / (N - k * n_seeds) - P**2
+        gamma += 2 * (1 - k / n_steps) * R / R0
+    return gamma
+
+
+if __name__ == '__main__':
+
+    from water_constants import water_constants
+
+    #              Vr,max Vu,max Vt,max Qp,max
+    v = np.array([ 10000 ,  500 ,  500 ,  200 ])
+
+    analysis_constants = water_constants()
+    analysis_constants[-2] = 50             # 50 year simulation
+
+    for event in ['flood', 'empty']:
+        water_rare_event(v, analysis_constants, event, N=100)
+
+# water_rare_event ------------------------------------------------ 2026-10-19
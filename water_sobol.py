@@ -0,0 +1,120 @@
+# water_sobol.py
+# global sensitivity analysis of the lifetime cost of a water supply design
+# first-order and total-order Sobol' indices from Saltelli sampling
+
+import numpy as np
+from scipy.stats import qmc
+from water_constants import water_constants_set
+from water_batch import water_batch
+
+
+def water_sobol(v, constants, names, lb, ub, N=256, seed=0, n_workers=None, n_boot=200, ci=95):
+    """
+    S1, ST, S1_ci, ST_ci = water_sobol( v , constants , names , lb , ub , N , seed , n_workers , n_boot , ci )
+    first-order and total-order Sobol' indices of the lifetime cost with
+    respect to uniformly distributed constants and design variables.
+    The N*(d+2) model evaluations are run in parallel by water_batch, all
+    with the same random number seed, so that the indices measure the
+    effects of the named inputs and not of the random rainfall, temperature,
+    population and demand sequences.
+
+     INPUTS     DESCRIPTION
+     v          design variables [ Vr_max , Vu_max , Vt_max , Qp_max ]
+     constants  a set of many constants involved in this system
+     names      d names of constants, entries of constant arrays, or design
+                variables, see water_constants_set,  e.g. ['beta_e', 'R[0,2]', 'Vr_max']
+     lb , ub    lower and upper bounds of the d named inputs
+     N          number of Saltelli base samples, a power of 2    default 256
+     seed       seed for the Sobol' sequence and the simulations default 0
+     n_workers  number of worker processes, see water_batch
+     n_boot     number of bootstrap resamples for the confidence intervals
+     ci         confidence level of the intervals, %             default 95
+
+     OUTPUTS    DESCRIPTION
+     S1         first-order Sobol' indices                        (d)
+     ST         total-order Sobol' indices                        (d)
+     S1_ci      confidence intervals of S1                        (d x 2)
+     ST_ci      confidence intervals of ST                        (d x 2)
+    """
+
+    d  = len(names)
+    lb = np.asarray(lb, dtype=float)
+    ub = np.asarray(ub, dtype=float)
+
+    # Saltelli sampling:  A, B, and A with column i from B, for each i
+    AB = qmc.Sobol(d=2*d, scramble=True, seed=seed).random(N)
+    A = lb + (ub - lb) * AB[:, :d]
+    B = lb + (ub - lb) * AB[:, d:]
+    X = [A, B]
+    for i in range(d):
+        ABi = A.copy()
+        ABi[:, i] = B[:, i]
+        X.append(ABi)
+    X = np.vstack(X)                                       # N*(d+2) x d
+
+    # water_constants_set appends the default controller gains to v if a
+    # gain is sampled, so V is sized from its output
+    V = []
+    C = []
+    for k in range(X.shape[0]):
+        C_k, v_k = water_constants_set(constants, v, names, X[k, :])
+        C.append(C_k)
+        V.append(v_k)
+    V = np.array(V)
+
+    print(f' water_sobol: {X.shape[0]} simulations of {d} inputs')
+    Y, _ = water_batch(V, C, seeds=[seed] * X.shape[0], n_workers=n_workers)
+    Y = Y.reshape(d + 2, N)
+
+    S1, ST = _sobol_indices(Y)
+
+    # bootstrap confidence intervals
+    rng = np.random.default_rng(seed)
+    S1_b = np.zeros((n_boot, d))
+    ST_b = np.zeros((n_boot, d))
+    for b in range(n_boot):
+        S1_b[b, :], ST_b[b, :] = _sobol_indices(Y[:, rng.integers(0, N, N)])
+    q = [50 - ci / 2, 50 + ci / 2]
+    S1_ci = np.percentile(S1_b, q, axis=0).T
+    ST_ci = np.percentile(ST_b, q, axis=0).T
+
+    print('                     S1                          ST')
+    for i in range(d):
+        print(f' {names[i]:>14s}  {S1[i]:6.3f} ({S1_ci[i,0]:6.3f} {S1_ci[i,1]:6.3f})'
+              f'   {ST[i]:6.3f} ({ST_ci[i,0]:6.3f} {ST_ci[i,1]:6.3f})')
+
+    return S1, ST, S1_ci, ST_ci
+
+
+def _sobol_indices(Y):
+    """
+    Saltelli (2010) first-order and Jansen total-order estimators from the
+    model evaluations Y = [ f(A) ; f(B) ; f(AB_1) ; ... ; f(AB_d) ]
+    """
+
+    fA  = Y[0, :]
+    fB  = Y[1, :]
+    fAB = Y[2:, :]
+    var = np.var(np.concatenate([fA, fB]))
+
+    S1 = np.mean(fB * (fAB - fA), axis=1) / var
+    ST = 0.5 * np.mean((fA - fAB)**2, axis=1) / var
+
+    return S1, ST
+
+
+if __name__ == '__main__':
+
+    from water_constants import water_constants
+
+    #              Vr,max Vu,max Vt,max Qp,max
+    v = np.array([ 10000 ,  500 ,  500 ,  200 ])
+
+    analysis_constants = water_constants()
+    analysis_constants[-2] = 50             # 50 year simulation
+
+    names = ['alpha_t', 'beta_e', 'T_r', 'Pv', 'R[0,0]', 'Vr_max', 'Qp_max']
+    x_nom = np.array([10.0, 0.20, 3.28, 0.05, 1000, 10000, 200])
+    water_sobol(v, analysis_constants, names, 0.8 * x_nom, 1.2 * x_nom, N=64)
+
+# water_sobol ----------------------------------------------------- 2026-10-19
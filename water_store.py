@@ -0,0 +1,255 @@
+# water_store.py
+# append-only on-disk store of the results of campaigns of water supply
+# system simulations, for analysis and plotting without re-simulation
+#
+# a store is a directory of shards.  Each shard holds up to 'chunk' records
+# in one .npy file per column, read lazily as memory maps, and an optional
+# compressed traj.npz file of state and flow trajectories, one entry per
+# record, decompressed only when that record is read.  Each shard is written
+# to a temporary directory and renamed into place, so a store is never seen
+# partially written, and several processes may append to the same store.
+# Records are keyed by design, scenario seed, and constants hash:
+# water_store_find locates them, and water_store_append skips the records
+# that are already in the store.
+
+import os
+import time
+import numpy as np
+
+
+def water_store_append(path, V, seeds, chash, cost, constraint, x=None, Q=None, traj=None, chunk=1000,
+                       skip_existing=True, **columns):
+    """
+    shards = water_store_append( path , V , seeds , chash , cost , constraint , x , Q , traj , chunk , skip_existing , **columns )
+    append N simulation records to the store in directory path.
+    A record with the design, seed, and constants hash of a record already
+    in the store, or earlier in V, is skipped, unless skip_existing is False
+    or its seed is -1 (not re-producible).
+
+     INPUTS     DESCRIPTION
+     path       directory of the store, created if it does not exist
+     V          design of each record                                (N x 4)
+     seeds      scenario random number seed of each record, -1 if none (N)
+     chash      constants hash of each record, or one for all records,
+                see water_constants_hash
+     cost       cost of each record                                  (N)
+     constraint constraints of each record                           (N x 2)
+     x , Q      state (N x 14 x days) and flow (N x 5 x days) trajectories,
+                or None to store no trajectories
+     traj       trajectory resolution:  None for every day,  k for every k-th day,
+                'year' for yearly averages
+     chunk      maximum number of records in one shard
+     skip_existing  skip the records already in the store        default True
+     columns    other per-record columns to store, e.g. rv = rv.T  (N x ...)
+
+     OUTPUTS    DESCRIPTION
+     shards     names of the new shards
+    """
+
+    V = np.atleast_2d(V)
+    N = V.shape[0]
+    if isinstance(chash, str):
+        chash = [chash] * N
+
+    columns['V'] = V
+    columns['seed'] = np.asarray(seeds, dtype=np.int64)
+    columns['chash'] = np.asarray(chash, dtype='U16')
+    columns['cost'] = np.asarray(cost, dtype=float)
+    columns['constraint'] = np.atleast_2d(constraint).reshape(N, -1)
+
+    if skip_existing:
+        keys = set()
+        if os.path.isdir(path):
+            data = water_store_load(path, ['V', 'seed', 'chash'])
+            if data:
+                keys = set(_record_keys(np.asarray(data['V']), np.asarray(data['seed']), np.asarray(data['chash'])))
+        keep = []
+        for i, key in enumerate(_record_keys(V, columns['seed'], columns['chash'])):
+            if columns['seed'][i] < 0 or key not in keys:
+                keep.append(i)
+                keys.add(key)
+        if len(keep) < N:
+            columns = {key: np.asarray(value)[keep] for key, value in columns.items()}
+            if x is not None:
+                x = [x[i] for i in keep]
+            if Q is not None:
+                Q = [Q[i] for i in keep]
+            N = len(keep)
+
+    os.makedirs(path, exist_ok=True)
+    shards = []
+    for i0 in range(0, N, chunk):
+        i1 = min(i0 + chunk, N)
+        name = f'shard-{time.time_ns():020d}-{os.getpid()}'
+        tmp = os.path.join(path, '.tmp-' + name)
+        os.makedirs(tmp)
+        for key, value in columns.items():
+            np.save(os.path.join(tmp, key + '.npy'), np.asarray(value)[i0:i1])
+        if x is not None:
+            trajectories = {}
+            for i in range(i0, i1):
+                trajectories[f'x_{i-i0}'] = _downsample(x[i], traj)
+                if Q is not None:
+                    trajectories[f'Q_{i-i0}'] = _downsample(Q[i], traj)
+            np.savez_compressed(os.path.join(tmp, 'traj.npz'), **trajectories)
+        os.rename(tmp, os.path.join(path, name))
+        shards.append(name)
+
+    return shards
+
+
+def water_store_load(path, columns=None):
+    """
+    data = water_store_load( path , columns )
+    open columns of all the records in the store in directory path.
+    Each column is a StoreColumn of the memory-mapped arrays of the shards,
+    so records are read from disk only when they are indexed, and
+    np.asarray( data[key] ) reads a whole column.
+
+     INPUTS     DESCRIPTION
+     path       directory of the store
+     columns    list of column names to read, None for all the columns
+                common to every shard
+
+     OUTPUTS    DESCRIPTION
+     data       dictionary of the StoreColumns of all records, with the columns
+                'shard' and 'row' locating the trajectories of each record,
+                see water_store_trajectory
+    """
+
+    shards = sorted(s for s in os.listdir(path) if s.startswith('shard-'))
+    if not shards:
+        return {}
+
+    if columns is None:         # the columns common to all shards
+        columns = set.intersection(*[{f[:-4] for f in os.listdir(os.path.join(path, shard))
+                                      if f.endswith('.npy')} for shard in shards])
+        columns = sorted(columns)
+
+    data = {}
+    for shard in shards:
+        n = 0
+        for key in columns:
+            value = np.load(os.path.join(path, shard, key + '.npy'), mmap_mode='r')
+            data.setdefault(key, []).append(value)
+            n = len(value)
+        data.setdefault('shard', []).append(np.full(n, shard, dtype=f'U{len(shard)}'))
+        data.setdefault('row', []).append(np.arange(n))
+
+    return {key: StoreColumn(parts) for key, parts in data.items()}
+
+
+class StoreColumn:
+    """
+    column = StoreColumn( parts )
+    a column of a store, made of the memory-mapped arrays of its shards.
+    column[i], column[i0:i1], and column[rows] read only the records they
+    index;  np.asarray( column ) reads and concatenates the whole column.
+    """
+
+    def __init__(self, parts):
+        self.parts = parts
+        self.offsets = np.cumsum([0] + [len(part) for part in parts])
+        self.shape = (int(self.offsets[-1]), *parts[0].shape[1:])
+        self.dtype = parts[0].dtype
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __array__(self, dtype=None, copy=None):
+        return np.concatenate(self.parts).astype(dtype or self.dtype, copy=False)
+
+    def __getitem__(self, index):
+        rows, rest = (index[0], index[1:]) if isinstance(index, tuple) else (index, ())
+
+        if np.isscalar(rows):               # one record
+            i = int(rows) + len(self) if rows < 0 else int(rows)
+            if not 0 <= i < len(self):
+                raise IndexError(f'StoreColumn: index {rows} out of range for {len(self)} records')
+            k = np.searchsorted(self.offsets, i, side='right') - 1
+            return self.parts[k][(i - self.offsets[k], *rest)]
+
+        if isinstance(rows, slice):
+            rows = np.arange(*rows.indices(len(self)))
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        rows = np.where(rows < 0, rows + len(self), rows)
+        if np.any((rows < 0) | (rows >= len(self))):
+            raise IndexError(f'StoreColumn: index out of range for {len(self)} records')
+
+        k = np.searchsorted(self.offsets, rows, side='right') - 1
+        out = np.empty((len(rows), *self.shape[1:]), dtype=self.dtype)
+        for s in np.unique(k):
+            out[k == s] = self.parts[s][rows[k == s] - self.offsets[s]]
+
+        return out[(slice(None), *rest)]
+
+
+def water_store_find(path, v=None, seed=None, chash=None):
+    """
+    index = water_store_find( path , v , seed , chash )
+    the records of the store in directory path with design v, scenario seed,
+    and constants hash chash;  None matches any.  data[key][index] are the
+    columns of these records, for data = water_store_load( path ).
+    """
+
+    data = water_store_load(path, ['V', 'seed', 'chash'])
+    if not data:
+        return np.zeros(0, dtype=int)
+
+    match = np.ones(len(data['seed']), dtype=bool)
+    if v is not None:
+        V = np.asarray(data['V'])
+        v = np.asarray(v, dtype=float)
+        if V.shape[1] != len(v):
+            return np.zeros(0, dtype=int)
+        match &= np.all(V == v, axis=1)
+    if seed is not None:
+        match &= np.asarray(data['seed']) == seed
+    if chash is not None:
+        match &= np.asarray(data['chash']) == chash
+
+    return np.flatnonzero(match)
+
+
+def _record_keys(V, seeds, chash):
+    """
+    the key ( design , seed , constants hash ) of each record
+    """
+
+    V = np.asarray(V, dtype=float)
+    return [(V[i].tobytes(), int(seeds[i]), str(chash[i])) for i in range(len(seeds))]
+
+
+def water_store_trajectory(path, shard, row):
+    """
+    x, Q = water_store_trajectory( path , shard , row )
+    read the stored state and flow trajectories of one record.
+    Q is None if the flows were not stored, and x and Q are None if the
+    trajectories of the record's shard were not stored.
+    """
+
+    if not os.path.exists(os.path.join(path, shard, 'traj.npz')):
+        return None, None
+
+    with np.load(os.path.join(path, shard, 'traj.npz')) as traj:
+        x = traj[f'x_{row}']
+        Q = traj[f'Q_{row}'] if f'Q_{row}' in traj.files else None
+
+    return x, Q
+
+
+def _downsample(a, traj):
+    """
+    trajectory a (n x days) every day, every traj-th day, or averaged over each year
+    """
+
+    a = np.asarray(a)
+    if traj is None:
+        return a
+    if traj == 'year':
+        return a.reshape(a.shape[0], -1, 365).mean(axis=2)
+    return a[:, ::traj]
+
+# water_store ----------------------------------------------------- 2026-10-19